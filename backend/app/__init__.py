@@ -3,16 +3,33 @@ SnapUpdate Backend Application
 Flask server for handling app updates
 """
 
+# Imported first so the import phase includes Flask
+from .startup import startup
+import os
 from flask import Flask
 from flask_cors import CORS
 
-def create_app():
-    """Application factory pattern"""
-    app = Flask(__name__)
-    CORS(app)
+startup.record('import', startup.elapsed())
+
+def create_app(warm_up: bool = True):
+    """Application factory pattern; the default catalog is loaded in the background unless warm_up is False"""
+    with startup.measure('app_factory'):
+        app = Flask(__name__)
+        CORS(app)
+        
+        # Stream APKs from data/apks instead of pointing clients at GitHub
+        app.config['SERVE_APKS'] = os.getenv('SERVE_APKS', 'False').lower() == 'true'
     
-    # Import and register blueprints
-    from .routes import api_bp
-    app.register_blueprint(api_bp, url_prefix='/api/v1')
+    with startup.measure('blueprints'):
+        # Import and register blueprints (catalogs are opened on first use, not at import)
+        from .routes import api_bp, warm_up_catalog
+        app.register_blueprint(api_bp, url_prefix='/api/v1')
+        
+        # Per-endpoint request counts and latency histograms, served on /metrics
+        from .metrics import init_metrics
+        init_metrics(app)
     
-    return app 
\ No newline at end of file
+    # Accept requests right away; early ones load what they need themselves
+    if warm_up and os.getenv('CATALOG_WARM_UP', 'True').lower() == 'true':
+        startup.warm_up(warm_up_catalog)
+    return app
\ No newline at end of file
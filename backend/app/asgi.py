@@ -0,0 +1,514 @@
+"""
+ASGI application for SnapUpdate Backend
+Update polls are answered on the event loop from in-memory catalog snapshots;
+every other /api/v1 route runs the Flask app in a thread pool
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from data.metrics import metrics, record_exception
+from data.notifier import WATCH_INTERVAL
+from .encoding import JSON_TYPE, negotiate_media_type
+from .responses import parse_abis
+from .routes import catalogs, get_update_responses, load_controller
+from .startup import startup
+from .streaming import (SSE_HEADERS, SSE_HEARTBEAT, STREAM_HEARTBEAT, STREAM_MAX_SECONDS,
+                        parse_wait, sse_event, sse_retry, wants_event_stream)
+
+API_PREFIX = '/api/v1'
+WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', '8'))
+STREAM_QUEUE_SIZE = 8
+FILE_BLOCK_SIZE = 64 * 1024
+
+class _CatalogView:
+    """Latest catalog snapshot and patch index of one app channel, refreshed off the event loop"""
+    
+    def __init__(self, manager):
+        self.manager = manager
+        self.responses = get_update_responses(manager)
+        self.refresh()
+    
+    def refresh(self):
+        """Pick up store changes (a stat or one SQLite lookup, plus a reload if needed); runs in a worker thread"""
+        self.catalog = self.manager.get_catalog()
+        self.refresh_files()
+    
+    def refresh_files(self):
+        """Pick up newly built patches and re-indexed APKs, which change without a catalog write"""
+        self.patches = self.manager.patches.index()
+        self.manifests = self.manager.get_apk_manifests()
+
+class _FileWrapper:
+    """wsgi.file_wrapper reading large blocks so streamed APKs cross the thread boundary in few hops"""
+    
+    def __init__(self, file, block_size: int = FILE_BLOCK_SIZE):
+        self.file = file
+        self.block_size = max(block_size, FILE_BLOCK_SIZE)
+    
+    def __iter__(self):
+        return iter(lambda: self.file.read(self.block_size), b'')
+    
+    def close(self):
+        self.file.close()
+
+class _Aborted(Exception):
+    """The client went away while a WSGI response was streaming"""
+
+class AsyncUpdateAPI:
+    """Raw ASGI app: async handlers for the polling hot paths, Flask in an executor for the rest"""
+    
+    def __init__(self, wsgi_app, wsgi_threads: int = WSGI_THREADS):
+        self.wsgi_app = wsgi_app
+        self._executor = ThreadPoolExecutor(max_workers=wsgi_threads, thread_name_prefix='wsgi')
+        self._views = {}
+        self._changes = {}
+        self._loop = None
+        self._watcher = None
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        if self._loop is None:
+            self._listen()
+        
+        route = self._route(scope)
+        if route is None:
+            return await self._wsgi(scope, receive, send)
+        handler, app_id, endpoint = route
+        started = time.perf_counter()
+        
+        async def timed_send(message):
+            # Same measure as the Flask hooks: time until the response headers are ready
+            if message['type'] == 'http.response.start':
+                metrics.observe_request(endpoint, 'GET', message['status'], time.perf_counter() - started)
+                startup.responded()
+            await send(message)
+        
+        return await handler(scope, receive, timed_send, app_id)
+    
+    def _route(self, scope) -> Optional[Tuple]:
+        """Match the async-handled GET routes, with or without the /apps/<app_id> namespace (named like the Flask endpoints)"""
+        path = scope['path']
+        if scope['method'] != 'GET' or not path.startswith(API_PREFIX):
+            return None
+        path = path[len(API_PREFIX):]
+        app_id = None
+        if path.startswith('/apps/'):
+            app_id, _, path = path[len('/apps/'):].partition('/')
+            path = '/' + path
+        if path == '/update':
+            return self._update, app_id, 'api.check_update'
+        if path == '/update/stream':
+            return self._stream, app_id, 'api.stream_update'
+        if path == '/version/current':
+            return self._current_version, app_id, 'api.get_current_server_version'
+        if path == '/health' and app_id is None:
+            return self._health, None, 'api.health_check'
+        return None
+    
+    async def _view(self, app_id: Optional[str], channel: Optional[str]) -> _CatalogView:
+        """Catalog view of an app channel; the first request for it loads the catalog in a worker thread"""
+        view = self._views.get((app_id, channel))
+        if view is None:
+            loop = asyncio.get_running_loop()
+            manager = await loop.run_in_executor(self._executor, catalogs.get, app_id, channel)
+            view = self._views.get((manager.app_id, manager.channel))
+            if view is None:
+                view = await loop.run_in_executor(self._executor, _CatalogView, manager)
+                view = self._views.setdefault((manager.app_id, manager.channel), view)
+            self._views[(app_id, channel)] = view
+        return view
+    
+    def _listen(self):
+        """Subscribe to the process-wide change notifier (it also watches other workers' writes)"""
+        self._loop = asyncio.get_running_loop()
+        catalogs.notifier.add_listener(
+            lambda key: self._loop.call_soon_threadsafe(lambda: self._loop.create_task(self._changed(key))))
+        self._watcher = self._loop.create_task(self._watch_files())
+    
+    async def _watch_files(self):
+        """Poll the patch index and APK metadata of every view (built in the background, so never notified)"""
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            try:
+                await self._loop.run_in_executor(self._executor, self._refresh_files)
+            except Exception as e:
+                print(f"Error refreshing patches and APK index: {e}")
+    
+    async def _changed(self, key):
+        """Swap in the changed catalog's fresh snapshot, then wake its streams"""
+        view = self._views.get(key)
+        if view is not None:
+            try:
+                await self._loop.run_in_executor(self._executor, view.refresh)
+            except Exception as e:
+                print(f"Error refreshing catalog {key}: {e}")
+        event = self._changes.pop(key, None)
+        if event is not None:
+            event.set()
+    
+    def _change_event(self, key) -> asyncio.Event:
+        """Event set on the next change of a catalog"""
+        event = self._changes.get(key)
+        if event is None:
+            event = self._changes[key] = asyncio.Event()
+        return event
+    
+    def _refresh_views(self):
+        for view in set(self._views.values()):
+            view.refresh()
+    
+    def _refresh_files(self):
+        for view in set(self._views.values()):
+            view.refresh_files()
+    
+    async def _update(self, scope, receive, send, app_id: Optional[str]):
+        """Async version of GET /update: no thread, no disk access on the request path"""
+        started = time.perf_counter()
+        try:
+            # Under overload, tell clients to come back later instead of doing the work
+            retry_after = load_controller.retry_after()
+            if retry_after is not None:
+                return await self._send_json(send, 503, {'error': 'Server busy', 'retryAfterSeconds': retry_after},
+                                             [(b'retry-after', str(retry_after).encode())])
+            
+            args = _query_args(scope)
+            try:
+                view = await self._view(app_id, args.get('channel'))
+            except KeyError as e:
+                return await self._send_json(send, 404, {'error': e.args[0]})
+            current_code = _int_arg(args, 'versionCode')
+            current_version = args.get('version', '1.0' if current_code is None else None)
+            media_type = negotiate_media_type(_header(scope, b'accept'))
+            view.manager.increment_stat('update_checks')
+            body, etag = view.responses.answer(
+                view.catalog, view.patches, current_version, current_code, args.get('deviceId'), args.get('cohort'),
+                media_type, view.manifests, _int_arg(args, 'sdk'), parse_abis(args.get('abi')))
+            headers = [(b'etag', f'"{etag}"'.encode()), (b'cache-control', b'no-cache'), (b'vary', b'Accept'), *_hint_headers()]
+            
+            # Answer polls that already hold this exact response without a body
+            if _etag_matches(_header(scope, b'if-none-match'), etag):
+                return await self._send(send, 304, b'', headers, content_type=None)
+            return await self._send(send, 200, body, headers, content_type=media_type.encode())
+            
+        except Exception as e:
+            record_exception('api.check_update', e)
+            return await self._send_json(send, 500, {'error': str(e)})
+        finally:
+            load_controller.record(time.perf_counter() - started)
+    
+    async def _stream(self, scope, receive, send, app_id: Optional[str]):
+        """Async version of GET /update/stream: held connections cost a coroutine, not a thread"""
+        args = _query_args(scope)
+        try:
+            wait = parse_wait(args.get('wait'))
+        except ValueError as e:
+            return await self._send_json(send, 400, {'error': str(e)})
+        try:
+            view = await self._view(app_id, args.get('channel'))
+        except KeyError as e:
+            return await self._send_json(send, 404, {'error': e.args[0]})
+        
+        key = (view.manager.app_id, view.manager.channel)
+        current_code = _int_arg(args, 'versionCode')
+        current_version = args.get('version', '1.0' if current_code is None else None)
+        event_stream = wants_event_stream(_header(scope, b'accept'))
+        media_type = JSON_TYPE if event_stream else negotiate_media_type(_header(scope, b'accept'))
+        
+        sdk = _int_arg(args, 'sdk')
+        abis = parse_abis(args.get('abi'))
+        
+        def answer():
+            return view.responses.answer(view.catalog, view.patches, current_version, current_code,
+                                         args.get('deviceId'), args.get('cohort'), media_type, view.manifests, sdk, abis)
+        
+        view.manager.increment_stat('update_streams')
+        disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+        try:
+            if event_stream:
+                await self._event_stream(send, key, answer, _header(scope, b'last-event-id'), disconnected)
+            else:
+                await self._long_poll(scope, send, key, answer, media_type, wait, disconnected)
+        except _Aborted:
+            pass
+        finally:
+            disconnected.cancel()
+    
+    async def _long_poll(self, scope, send, key, answer, media_type: str, wait: float, disconnected):
+        """Answer as soon as the client's ETag is stale, or 304 when the wait runs out"""
+        known = _header(scope, b'if-none-match')
+        deadline = self._loop.time() + wait
+        while True:
+            changed = self._change_event(key)
+            body, etag = answer()
+            headers = [(b'etag', f'"{etag}"'.encode()), (b'cache-control', b'no-cache'), (b'vary', b'Accept'), *_hint_headers()]
+            if not _etag_matches(known, etag):
+                return await self._send(send, 200, body, headers, content_type=media_type.encode())
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                return await self._send(send, 304, b'', headers, content_type=None)
+            await _wait_change(changed, disconnected, remaining)
+    
+    async def _event_stream(self, send, key, answer, last_event_id: Optional[str], disconnected):
+        """Send the current answer (unless the client already has it), then one event per catalog change"""
+        headers = [(name.lower().encode(), value.encode()) for name, value in SSE_HEADERS.items()]
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            *headers, (b'content-type', b'text/event-stream'), (b'access-control-allow-origin', b'*')]})
+        await send({'type': 'http.response.body', 'body': sse_retry(), 'more_body': True})
+        
+        deadline = self._loop.time() + STREAM_MAX_SECONDS
+        sent = last_event_id
+        changed = self._change_event(key)
+        while True:
+            body, etag = answer()
+            if etag != sent:
+                await send({'type': 'http.response.body', 'body': sse_event(body, etag), 'more_body': True})
+                sent = etag
+            
+            # Heartbeats keep proxies from closing idle streams
+            while True:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    return await send({'type': 'http.response.body', 'body': b''})
+                if await _wait_change(changed, disconnected, min(STREAM_HEARTBEAT, remaining)):
+                    changed = self._change_event(key)
+                    break
+                await send({'type': 'http.response.body', 'body': SSE_HEARTBEAT, 'more_body': True})
+    
+    async def _current_version(self, scope, receive, send, app_id: Optional[str]):
+        """Async version of GET /version/current"""
+        try:
+            view = await self._view(app_id, _query_args(scope).get('channel'))
+        except KeyError as e:
+            return await self._send_json(send, 404, {'error': e.args[0]})
+        latest = view.catalog.latest
+        return await self._send_json(send, 200, {
+            'currentVersion': latest['versionName'] if latest else '1.0',
+            'versionCode': latest['versionCode'] if latest else 1,
+            'releaseNotes': latest['releaseNotes'] if latest else '',
+            'isForceUpdate': latest.get('isForceUpdate', False) if latest else False
+        }, _hint_headers())
+    
+    async def _health(self, scope, receive, send, app_id: Optional[str]):
+        """Async version of GET /health"""
+        return await self._send_json(send, 200, {
+            'status': 'healthy',
+            'server_version': '1.0.0',
+            'uptime': round(time.time() - metrics.started, 1),
+            'startup': startup.report()
+        })
+    
+    async def _send_json(self, send, status: int, payload: Dict, headers: List = ()):
+        """Serialize like Flask's jsonify (sorted keys, compact separators)"""
+        body = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode() + b'\n'
+        await self._send(send, status, body, list(headers))
+    
+    @staticmethod
+    async def _send(send, status: int, body: bytes, headers: List, content_type: Optional[bytes] = b'application/json'):
+        headers = [*headers, (b'content-length', str(len(body)).encode()), (b'access-control-allow-origin', b'*')]
+        if content_type is not None:
+            headers.append((b'content-type', content_type))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+    
+    async def _wsgi(self, scope, receive, send):
+        """Run the Flask app for this request in the thread pool, streaming its output back with backpressure"""
+        body = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+        aborted = threading.Event()
+        loop.run_in_executor(self._executor, self._run_wsgi, _environ(scope, b''.join(body)), loop, queue, aborted)
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind == 'start':
+                    await send({'type': 'http.response.start', 'status': payload[0], 'headers': payload[1]})
+                elif kind == 'body':
+                    await send({'type': 'http.response.body', 'body': payload, 'more_body': True})
+                else:
+                    break
+            
+            # Writes through the Flask app are visible to the very next poll
+            if scope['method'] not in ('GET', 'HEAD', 'OPTIONS'):
+                await loop.run_in_executor(self._executor, self._refresh_views)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            # Unblock the worker thread if the client disconnected mid-stream
+            aborted.set()
+            while not queue.empty():
+                queue.get_nowait()
+    
+    def _run_wsgi(self, environ: Dict, loop, queue: asyncio.Queue, aborted: threading.Event):
+        """Worker thread: call the WSGI app and hand status, headers and body chunks to the event loop"""
+        response = {'sent': False}
+        
+        def put(item):
+            if aborted.is_set():
+                raise _Aborted()
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+        
+        def start_response(status, headers, exc_info=None):
+            response['start'] = (int(status.split(' ', 1)[0]),
+                                 [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers])
+            return write
+        
+        def write(data):
+            if not response['sent']:
+                put(('start', response['start']))
+                response['sent'] = True
+            if data:
+                put(('body', data))
+        
+        result = None
+        try:
+            result = self.wsgi_app(environ, start_response)
+            for chunk in result:
+                write(chunk)
+            write(b'')
+            put(('end', None))
+        except _Aborted:
+            pass
+        except Exception as e:
+            print(f"Error serving {environ['PATH_INFO']}: {e}")
+            if not response['sent']:
+                try:
+                    put(('start', (500, [(b'content-type', b'application/json')])))
+                    put(('body', json.dumps({'error': str(e)}).encode()))
+                except _Aborted:
+                    pass
+            try:
+                put(('end', None))
+            except _Aborted:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+    
+    async def _lifespan(self, receive, send):
+        """Start the catalog watcher with the server and flush buffered stats on shutdown"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self._loop is None:
+                    self._listen()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._watcher is not None:
+                    self._watcher.cancel()
+                await asyncio.get_running_loop().run_in_executor(self._executor, catalogs.stats.flush)
+                self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+async def _wait_disconnect(receive):
+    """Resolve once the client hangs up"""
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+async def _wait_change(changed: asyncio.Event, disconnected: asyncio.Future, timeout: float) -> bool:
+    """Wait for a catalog change (True) or the timeout (False); raises _Aborted if the client went away"""
+    waiter = asyncio.ensure_future(changed.wait())
+    try:
+        done, _ = await asyncio.wait({waiter, disconnected}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        waiter.cancel()
+    if disconnected in done:
+        raise _Aborted()
+    return waiter in done
+
+def _hint_headers() -> List[Tuple[bytes, bytes]]:
+    return [(name.lower().encode(), value.encode()) for name, value in load_controller.hint_headers().items()]
+
+def _query_args(scope) -> Dict[str, str]:
+    """First value of each query parameter, like request.args.get()"""
+    query = parse_qs(scope['query_string'].decode('latin-1'), keep_blank_values=True)
+    return {name: values[0] for name, values in query.items()}
+
+def _int_arg(args: Dict[str, str], name: str) -> Optional[int]:
+    """Like request.args.get(name, type=int): None when missing or not an integer"""
+    try:
+        return int(args[name])
+    except (KeyError, ValueError):
+        return None
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against an If-None-Match header"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == '*' or candidate.strip('"') == etag:
+            return True
+    return False
+
+def _environ(scope, body: bytes) -> Dict:
+    """Build a WSGI environ (PEP 3333) from an ASGI HTTP scope"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': str(client[0]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'wsgi.file_wrapper': _FileWrapper
+    }
+    for name, value in scope['headers']:
+        key = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = f'HTTP_{key}'
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    
+    # The body is fully buffered, so chunked uploads reach Flask with a known length
+    environ.pop('HTTP_TRANSFER_ENCODING', None)
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+def create_asgi_app(wsgi_app=None) -> AsyncUpdateAPI:
+    """Wrap the Flask app (created if not given) in the async update API"""
+    if wsgi_app is None:
+        from . import create_app
+        wsgi_app = create_app()
+    return AsyncUpdateAPI(wsgi_app)
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""
+Wire encodings for SnapUpdate Backend
+Accept-Encoding (gzip/brotli) and Accept (JSON, CBOR, MessagePack) negotiation with cached compressed bodies
+"""
+
+import gzip
+import json
+import zlib
+import struct
+import threading
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+from flask import Response
+
+from data.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is optional; CBOR is built in
+    msgpack = None
+
+MIN_COMPRESS_SIZE = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson')
+
+_HIT = (('cache', 'compressed_body'), ('result', 'hit'))
+_MISS = (('cache', 'compressed_body'), ('result', 'miss'))
+
+JSON_TYPE = 'application/json'
+CBOR_TYPE = 'application/cbor'
+MSGPACK_TYPE = 'application/msgpack'
+MSGPACK_ALIASES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+def _accepted(header: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept / Accept-Encoding header into {token: q}"""
+    accepted = {}
+    for part in (header or '').split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[token] = q
+    return accepted
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick 'br' (when brotli is installed) or 'gzip' from Accept-Encoding; None for identity"""
+    accepted = _accepted(accept_encoding)
+    for encoding in (('br', 'gzip') if brotli is not None else ('gzip',)):
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """Pick a compact binary type for the update check when the client asks for one, JSON otherwise"""
+    accepted = _accepted(accept)
+    best, best_q = JSON_TYPE, accepted.get(JSON_TYPE, 0.0)
+    candidates = [(CBOR_TYPE, accepted.get(CBOR_TYPE, 0.0))]
+    if msgpack is not None:
+        candidates.append((MSGPACK_TYPE, max(accepted.get(alias, 0.0) for alias in MSGPACK_ALIASES)))
+    for media_type, q in candidates:
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
+
+def encode_payload(payload, media_type: str) -> bytes:
+    """Serialize a response payload in the negotiated media type"""
+    if media_type == CBOR_TYPE:
+        return cbor_dumps(payload)
+    if media_type == MSGPACK_TYPE:
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+def cbor_dumps(value) -> bytes:
+    """Minimal CBOR (RFC 8949) encoder for JSON-like values"""
+    out = bytearray()
+    _cbor_encode(value, out)
+    return bytes(out)
+
+def _cbor_head(major: int, length: int, out: bytearray):
+    if length < 24:
+        out.append(major << 5 | length)
+    elif length < 0x100:
+        out += struct.pack('>BB', major << 5 | 24, length)
+    elif length < 0x10000:
+        out += struct.pack('>BH', major << 5 | 25, length)
+    elif length < 0x100000000:
+        out += struct.pack('>BI', major << 5 | 26, length)
+    else:
+        out += struct.pack('>BQ', major << 5 | 27, length)
+
+def _cbor_encode(value, out: bytearray):
+    if value is None:
+        out.append(0xf6)
+    elif value is True:
+        out.append(0xf5)
+    elif value is False:
+        out.append(0xf4)
+    elif isinstance(value, int):
+        if value >= 0:
+            _cbor_head(0, value, out)
+        else:
+            _cbor_head(1, -1 - value, out)
+    elif isinstance(value, float):
+        out += struct.pack('>Bd', 0xfb, value)
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        _cbor_head(3, len(data), out)
+        out += data
+    elif isinstance(value, (bytes, bytearray)):
+        _cbor_head(2, len(value), out)
+        out += value
+    elif isinstance(value, (list, tuple)):
+        _cbor_head(4, len(value), out)
+        for item in value:
+            _cbor_encode(item, out)
+    elif isinstance(value, dict):
+        _cbor_head(5, len(value), out)
+        for key, item in value.items():
+            _cbor_encode(key, out)
+            _cbor_encode(item, out)
+    else:
+        raise TypeError(f"Cannot CBOR-encode {type(value).__name__}")
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """One-shot gzip or brotli compression"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+def _compress_stream(chunks: Iterable, encoding: str):
+    """Incrementally compress a streamed body"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = process(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield finish()
+
+class CompressedBodyCache:
+    """Compressed bodies per scope (e.g. one catalog); a scope's entries are dropped when its token changes"""
+    
+    MAX_ENTRIES = 256
+    
+    def __init__(self):
+        self._scopes = {}
+        self._lock = threading.Lock()
+    
+    def get(self, scope: Hashable, token, key: Hashable, body: bytes, encoding: str) -> bytes:
+        """Compressed body, compressed once per (token, key, encoding)"""
+        cached = self._scopes.get(scope)
+        if cached is not None and cached[0] is token:
+            compressed = cached[1].get((key, encoding))
+            if compressed is not None:
+                metrics.inc('snapupdate_cache_requests_total', _HIT)
+                return compressed
+        
+        metrics.inc('snapupdate_cache_requests_total', _MISS)
+        compressed = compress(body, encoding)
+        with self._lock:
+            cached = self._scopes.get(scope)
+            if cached is None or cached[0] is not token:
+                cached = self._scopes[scope] = (token, {})
+            if len(cached[1]) < self.MAX_ENTRIES:
+                cached[1][(key, encoding)] = compressed
+        return compressed
+
+def compress_response(response: Response, accept_encoding: Optional[str], cache: CompressedBodyCache,
+                      cache_key: Optional[Tuple] = None) -> Response:
+    """Compress a JSON response for the client; cache_key (scope, token, key) reuses compressed bodies"""
+    if (response.status_code != 200 or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < MIN_COMPRESS_SIZE:
+            return response
+        if cache_key is not None:
+            scope, token, key = cache_key
+            response.set_data(cache.get(scope, token, key, body, encoding))
+        else:
+            response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    
+    # A compressed body is a different representation: downgrade a strong ETag like nginx does
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+    return response
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Poll interval control for SnapUpdate Backend
+Advertises when clients should check again and sheds load when the fleet polls too fast
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+class LoadController:
+    """Raises the advertised poll interval when request rate or latency cross thresholds"""
+    
+    LEVELS = (1, 2, 4, 8, 16)
+    # Share of the averages kept per second
+    DECAY = 0.7
+    
+    def __init__(self, base_interval: int = None, jitter_ratio: float = None,
+                 rate_threshold: float = None, latency_threshold: float = None, shed_rate: float = None):
+        self.base_interval = base_interval or int(os.getenv('POLL_INTERVAL_SECONDS', 3600))
+        self.jitter_ratio = jitter_ratio if jitter_ratio is not None else float(os.getenv('POLL_JITTER_RATIO', 0.25))
+        self.rate_threshold = rate_threshold or float(os.getenv('POLL_RATE_THRESHOLD', 200))
+        self.latency_threshold = latency_threshold or float(os.getenv('POLL_LATENCY_THRESHOLD', 0.05))
+        self.shed_rate = shed_rate or float(os.getenv('POLL_SHED_RATE', self.rate_threshold * 5))
+        self.level = 0
+        self.rate = 0.0
+        self.latency = 0.0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._window_latency = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, latency: float):
+        """Account one poll; once per second the rate/latency averages and the level are updated"""
+        with self._lock:
+            self._window_count += 1
+            self._window_latency += latency
+            self._tick(time.monotonic())
+    
+    def _tick(self, now: float):
+        """Roll the window once it is at least a second old (holds the lock)"""
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self._roll_window(now, elapsed)
+    
+    def _roll_window(self, now: float, elapsed: float):
+        """Fold the finished window into exponentially weighted averages and adjust the level.
+        The averages decay once per elapsed second, so an idle gap forgets an old burst."""
+        rate = self._window_count / elapsed
+        latency = self._window_latency / self._window_count if self._window_count else 0.0
+        keep = self.DECAY ** elapsed
+        self.rate = rate if self.rate == 0.0 else keep * self.rate + (1 - keep) * rate
+        self.latency = latency if self.latency == 0.0 else keep * self.latency + (1 - keep) * latency
+        self._window_start = now
+        self._window_count = 0
+        self._window_latency = 0.0
+        
+        if self.rate > self.rate_threshold or self.latency > self.latency_threshold:
+            self.level = min(self.level + 1, len(self.LEVELS) - 1)
+        elif self.rate < self.rate_threshold / 2 and self.latency < self.latency_threshold / 2:
+            self.level = max(self.level - int(elapsed), 0)
+    
+    def poll_hint(self) -> Tuple[int, int]:
+        """(nextCheckAfterSeconds, nextCheckJitterSeconds); clients wait next + uniform(0, jitter)"""
+        interval = self.base_interval * self.LEVELS[self.level]
+        return interval, int(interval * self.jitter_ratio)
+    
+    def hint_headers(self) -> Dict[str, str]:
+        """The poll hint as response headers: kept out of the /update body and ETag, so workers under different
+        load still agree on the ETag and 304s carry the current interval too"""
+        next_check, jitter = self.poll_hint()
+        return {'X-Next-Check-After': str(next_check), 'X-Next-Check-Jitter': str(jitter)}
+    
+    def retry_after(self) -> Optional[int]:
+        """Seconds to send in Retry-After when polls should be shed, otherwise None"""
+        if time.monotonic() - self._window_start >= 1.0:
+            # Checked before record(): after an idle gap, decay the stale rate first
+            with self._lock:
+                self._tick(time.monotonic())
+        if self.rate > self.shed_rate:
+            return self.poll_hint()[0]
+        return None
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Request instrumentation for SnapUpdate Backend
+Times every request in the app factory's hooks and serves the registry on /metrics
+"""
+
+import time
+
+from flask import Flask, Response, got_request_exception, request
+
+from data.metrics import metrics, record_exception
+from .routes import catalogs, load_controller
+from .startup import startup
+
+METRICS_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+_STARTED = 'snapupdate.started'
+
+def init_metrics(app: Flask):
+    """Install the request timer and the /metrics endpoint on an app"""
+    
+    @app.before_request
+    def _start_timer():
+        request.environ[_STARTED] = time.perf_counter()
+    
+    @app.after_request
+    def _record_request(response):
+        started = request.environ.get(_STARTED)
+        if started is not None:
+            metrics.observe_request(request.endpoint or 'unmatched', request.method, response.status_code,
+                                    time.perf_counter() - started)
+        startup.responded()
+        return response
+    
+    def _unhandled(sender, exception, **extra):
+        record_exception(request.endpoint, exception)
+    
+    got_request_exception.connect(_unhandled, app, weak=False)
+    app.add_url_rule('/metrics', 'metrics', lambda: Response(metrics.render(), content_type=METRICS_TYPE))
+
+def _catalog_revisions():
+    return {(('app', m.app_id), ('channel', m.channel)): m.get_catalog_revision() for m in catalogs.managers()}
+
+metrics.gauge('snapupdate_stats_flush_lag_seconds', 'Age of the oldest stats increment not yet written to disk',
+              lambda: {(): catalogs.stats.flush_lag()})
+metrics.gauge('snapupdate_stats_pending_events', 'Stats increments buffered since the last flush',
+              lambda: {(): catalogs.stats.pending()})
+metrics.gauge('snapupdate_catalog_revision', 'Revision of each loaded catalog', _catalog_revisions)
+metrics.gauge('snapupdate_poll_interval_seconds', 'Poll interval currently advertised to clients',
+              lambda: {(): load_controller.poll_hint()[0]})
+metrics.gauge('snapupdate_poll_rate', 'Smoothed update polls per second in this worker',
+              lambda: {(): load_controller.rate})
\ No newline at end of file
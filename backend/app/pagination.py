@@ -0,0 +1,73 @@
+"""
+Listing helpers for SnapUpdate Backend
+Cursor pagination, field projection and streamed JSON bodies
+"""
+
+import base64
+import json
+from typing import Dict, Iterable, List, Optional
+
+from flask import Response
+
+MAX_LIMIT = 1000
+STREAM_THRESHOLD = 500
+# Compact like jsonify
+_COMPACT = (',', ':')
+
+def encode_cursor(value) -> str:
+    """Opaque cursor for the last item of a page"""
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def parse_limit(args) -> Optional[int]:
+    """Read ?limit=, capped at MAX_LIMIT; None means no limit"""
+    limit = args.get('limit')
+    if limit is None:
+        return None
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, MAX_LIMIT)
+
+def parse_fields(args) -> Optional[List[str]]:
+    """Read ?fields=a,b into a projection list"""
+    fields = args.get('fields')
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(',') if field.strip()]
+
+def project(record: Dict, fields: Optional[List[str]]) -> Dict:
+    """Keep only the requested fields of a record"""
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+def listing_response(key: str, items: List, extra: Dict, fields: Optional[List[str]] = None) -> Response:
+    """JSON body {key: items, **extra}; large listings are projected and serialized item by item while streaming"""
+    if len(items) <= STREAM_THRESHOLD:
+        body = {key: [project(item, fields) for item in items], **extra}
+        return Response(json.dumps(body, separators=_COMPACT), mimetype='application/json')
+    projected = (project(item, fields) for item in items)
+    return Response(_stream_listing(key, projected, extra), mimetype='application/json')
+
+def _stream_listing(key: str, items: Iterable, extra: Dict):
+    """Yield the listing JSON in chunks"""
+    yield '{' + json.dumps(key) + ':['
+    chunk = []
+    for index, item in enumerate(items):
+        chunk.append(('' if index == 0 else ',') + json.dumps(item, separators=_COMPACT))
+        if len(chunk) >= 100:
+            yield ''.join(chunk)
+            chunk = []
+    yield ''.join(chunk)
+    yield ']' + ''.join(',' + json.dumps(name) + ':' + json.dumps(value, separators=_COMPACT) for name, value in extra.items()) + '}'
\ No newline at end of file
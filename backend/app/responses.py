@@ -0,0 +1,270 @@
+"""
+Pre-rendered responses for the SnapUpdate update check
+"""
+
+import os
+import json
+import zlib
+import bisect
+import itertools
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from data.apk_manifest import is_compatible
+from data.metrics import metrics
+from .encoding import JSON_TYPE, encode_payload
+
+# Relative to the API base, like the other /api/v1 routes
+PATCH_URL_PREFIX = '/api/v1/patch'
+_NO_MANIFESTS = {}
+_COMPACT = (',', ':')
+
+# POST /update/batch: devices resolved and grouped together per output chunk, and per request at most
+BATCH_CHUNK_SIZE = 1000
+BATCH_MAX_DEVICES = int(os.getenv('BATCH_MAX_DEVICES', '100000'))
+BATCH_MAX_BYTES = int(os.getenv('BATCH_MAX_BYTES', str(16 * 1024 * 1024)))
+
+_HIT = (('cache', 'update_response'), ('result', 'hit'))
+_MISS = (('cache', 'update_response'), ('result', 'miss'))
+
+def parse_abis(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Read ?abi=arm64-v8a,armeabi-v7a (the device's supported ABIs) into a tuple"""
+    if not value:
+        return None
+    return tuple(abi.strip() for abi in value.split(',') if abi.strip()) or None
+
+def _batch_entry(entry) -> Tuple:
+    """Validate one batch device: (version, versionCode, deviceId, cohort, sdk, abis)"""
+    if not isinstance(entry, dict):
+        raise ValueError('Each device must be an object')
+    current_code = entry.get('versionCode')
+    sdk = entry.get('sdk')
+    for name, value in (('versionCode', current_code), ('sdk', sdk)):
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+            raise ValueError(f'{name} must be an integer')
+    current_version = entry.get('version', '1.0' if current_code is None else None)
+    if current_version is not None and not isinstance(current_version, str):
+        raise ValueError('version must be a string')
+    abis = entry.get('abi')
+    if isinstance(abis, str):
+        abis = parse_abis(abis)
+    elif isinstance(abis, list) and all(isinstance(abi, str) for abi in abis):
+        abis = tuple(abis) or None
+    elif abis is not None:
+        raise ValueError('abi must be a string or a list of strings')
+    device_id = entry.get('deviceId')
+    cohort = entry.get('cohort')
+    for name, value in (('deviceId', device_id), ('cohort', cohort)):
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f'{name} must be a string')
+    return current_version, current_code, device_id, cohort, sdk, abis
+
+class _RenderedRevision:
+    """Serialized update answers for one catalog snapshot, patch set and APK index"""
+    
+    def __init__(self, catalog, patches: Dict, manifests: Dict):
+        self.catalog = catalog
+        self.patches = patches
+        self.manifests = manifests
+        self.revision = catalog.revision
+        self.latest = catalog.latest
+        self.buckets = {}
+        self.bodies = {}
+        
+        # Device facts only matter up to what the indexed APKs require
+        self.max_min_sdk = max((m['minSdk'] for m in manifests.values() if isinstance(m.get('minSdk'), int)), default=0)
+        self.native = any(m.get('abis') for m in manifests.values())
+    
+    def profile(self, sdk: Optional[int], abis: Optional[Tuple[str, ...]]) -> Optional[Tuple]:
+        """Normalize (sdk, abis) so devices that can install every indexed APK share one cache entry"""
+        sdk = sdk if sdk is not None and sdk < self.max_min_sdk else None
+        abis = abis if abis and self.native else None
+        return (sdk, abis) if sdk is not None or abis else None
+
+class UpdateResponseCache:
+    """Holds serialized /update bodies per client version bucket for the current catalog revision"""
+    
+    MAX_BUCKETS = 256
+    
+    def __init__(self, version_manager, patch_url_prefix: str = PATCH_URL_PREFIX):
+        self.version_manager = version_manager
+        self.patch_url_prefix = patch_url_prefix
+        self._rendered = None
+        self._lock = threading.Lock()
+    
+    def get(self, current_version: Optional[str], current_code: Optional[int] = None,
+            device_id: Optional[str] = None, cohort: Optional[str] = None,
+            media_type: str = JSON_TYPE, sdk: Optional[int] = None, abis: Optional[Tuple[str, ...]] = None) -> Tuple[bytes, str]:
+        """Get (body, etag) of the update check answer for a client versionName or versionCode"""
+        return self.answer(self.version_manager.get_catalog(), self.version_manager.patches.index(),
+                           current_version, current_code, device_id, cohort, media_type,
+                           self.version_manager.get_apk_manifests(), sdk, abis)
+    
+    def answer(self, catalog, patches: Dict, current_version: Optional[str], current_code: Optional[int] = None,
+               device_id: Optional[str] = None, cohort: Optional[str] = None,
+               media_type: str = JSON_TYPE, manifests: Optional[Dict] = None, sdk: Optional[int] = None,
+               abis: Optional[Tuple[str, ...]] = None) -> Tuple[bytes, str]:
+        """Get (body, etag) against an already loaded catalog snapshot, patch index and APK index (no I/O)"""
+        rendered = self._current(catalog, patches, manifests)
+        bucket = self._resolve(rendered, current_version, current_code, device_id, cohort, rendered.profile(sdk, abis))
+        return self._body(rendered, bucket, media_type)
+    
+    def warm(self):
+        """Render the current snapshot's common answers ahead of the first poll"""
+        self._current(self.version_manager.get_catalog(), self.version_manager.patches.index(),
+                      self.version_manager.get_apk_manifests())
+    
+    def batch(self, catalog, patches: Dict, manifests: Optional[Dict], devices: Iterable,
+              chunk_size: int = BATCH_CHUNK_SIZE) -> Iterator[bytes]:
+        """NDJSON lines answering many devices against one snapshot: per chunk of devices, one line per distinct
+        (current version, answer) with the device ids that share it, then a summary line. Only the chunk's answer is buffered."""
+        rendered = self._current(catalog, patches, manifests)
+        total = groups = errors = 0
+        chunk = []
+        for index, device in enumerate(itertools.chain(devices, [None])):
+            if device is not None:
+                chunk.append((index, device))
+                if len(chunk) < chunk_size:
+                    continue
+            
+            grouped = {}
+            for position, entry in chunk:
+                try:
+                    current_version, current_code, device_id, cohort, sdk, abis = _batch_entry(entry)
+                except ValueError as e:
+                    errors += 1
+                    yield json.dumps({'index': position, 'error': str(e)}, separators=_COMPACT).encode('utf-8') + b'\n'
+                    continue
+                bucket = self._resolve(rendered, current_version, current_code, device_id, cohort,
+                                       rendered.profile(sdk, abis))
+                current = current_version if current_version is not None else current_code
+                grouped.setdefault((current, bucket), []).append(device_id)
+                total += 1
+            
+            for (current, bucket), device_ids in grouped.items():
+                body, etag = self._body(rendered, bucket, JSON_TYPE)
+                yield (b'{"currentVersion":' + json.dumps(current, separators=_COMPACT).encode('utf-8') +
+                       b',"deviceIds":' + json.dumps(device_ids, separators=_COMPACT).encode('utf-8') +
+                       b',"etag":"' + etag.encode('ascii') + b'","answer":' + body + b'}\n')
+            groups += len(grouped)
+            chunk = []
+        
+        yield json.dumps({'summary': {
+            'devices': total, 'groups': groups, 'errors': errors, 'catalogRevision': rendered.revision
+        }}, separators=_COMPACT).encode('utf-8') + b'\n'
+    
+    def _current(self, catalog, patches: Dict, manifests: Optional[Dict]) -> _RenderedRevision:
+        """Rendered state of this snapshot, rebuilt when the catalog, patch set or APK index object changed"""
+        manifests = manifests if manifests is not None else _NO_MANIFESTS
+        rendered = self._rendered
+        if (rendered is None or rendered.catalog is not catalog or rendered.patches is not patches
+                or rendered.manifests is not manifests):
+            rendered = self._rebuild(catalog, patches, manifests)
+        return rendered
+    
+    def _resolve(self, rendered: _RenderedRevision, current_version: Optional[str], current_code: Optional[int],
+                 device_id: Optional[str], cohort: Optional[str], profile: Optional[Tuple]):
+        """Bucket of one client; memoized per (version, profile) unless a staged rollout makes it device-specific"""
+        if rendered.catalog.staged:
+            # Staged rollouts make the answer device-specific; bucketing is a cheap hash
+            return self._bucket(rendered, current_version, current_code, device_id, cohort, profile)
+        client = (current_version, current_code, profile)
+        bucket = rendered.buckets.get(client)
+        if bucket is None:
+            bucket = self._bucket(rendered, current_version, current_code, profile=profile)
+            if len(rendered.buckets) < self.MAX_BUCKETS:
+                rendered.buckets[client] = bucket
+        return bucket
+    
+    def _body(self, rendered: _RenderedRevision, bucket, media_type: str) -> Tuple[bytes, str]:
+        """Pre-rendered (body, etag) of a bucket, rendered on first use"""
+        cached = rendered.bodies.get((bucket, media_type))
+        if cached is not None:
+            metrics.inc('snapupdate_cache_requests_total', _HIT)
+        else:
+            metrics.inc('snapupdate_cache_requests_total', _MISS)
+            cached = self._render(rendered, bucket, media_type)
+            if len(rendered.bodies) < self.MAX_BUCKETS:
+                rendered.bodies[(bucket, media_type)] = cached
+        return cached
+    
+    def _bucket(self, rendered: _RenderedRevision, current_version: Optional[str], current_code: Optional[int],
+                device_id: Optional[str] = None, cohort: Optional[str] = None, profile: Optional[Tuple] = None):
+        """Map a client version (and device, during staged rollouts or for SDK/ABI filtering) onto its response"""
+        compatible = None
+        if profile is not None:
+            compatible = lambda version: is_compatible(rendered.manifests.get(version['versionName']), *profile)
+        target = rendered.catalog.find_update(current_version, current_code, device_id, cohort, compatible)
+        if target is not None:
+            # Clients with a cached delta patch to the target also get the patch
+            patch_from = current_version if (current_version, target['versionName']) in rendered.patches else None
+            return ('update', target['versionName'], patch_from)
+        # Up to date: report the newest version this device may have, not a staged one it was just denied
+        catalog = rendered.catalog
+        latest = catalog.latest_for(device_id, cohort, compatible)
+        if current_version is not None:
+            client = catalog.by_name.get(current_version)
+        else:
+            index = bisect.bisect_left(catalog.codes, current_code)
+            client = catalog.ordered[index] if index < len(catalog.codes) and catalog.codes[index] == current_code else None
+        if client is not None and (latest is None or client['versionCode'] >= latest['versionCode']):
+            latest = client
+        return ('current', current_version if current_version is not None else str(current_code),
+                latest['versionName'] if latest else None)
+    
+    def _rebuild(self, catalog, patches: Dict, manifests: Dict) -> _RenderedRevision:
+        """Render the common responses once per catalog snapshot, patch set and APK index"""
+        with self._lock:
+            rendered = self._rendered
+            if (rendered is not None and rendered.catalog is catalog and rendered.patches is patches
+                    and rendered.manifests is manifests):
+                return rendered
+            
+            rendered = _RenderedRevision(catalog, patches, manifests)
+            if rendered.latest:
+                latest_name = rendered.latest['versionName']
+                for bucket in (('update', latest_name, None), ('current', latest_name, latest_name)):
+                    rendered.bodies[(bucket, JSON_TYPE)] = self._render(rendered, bucket, JSON_TYPE)
+            self._rendered = rendered
+            return rendered
+    
+    def _render(self, rendered: _RenderedRevision, bucket, media_type: str = JSON_TYPE) -> Tuple[bytes, str]:
+        """Serialize one response body (JSON, CBOR or MessagePack) and derive its strong ETag.
+        Buckets are ('update', target, patch source or None) or ('current', client version, newest eligible version)."""
+        kind, name, detail = bucket
+        if kind == 'update':
+            patch_from = detail
+            target = rendered.catalog.by_name[name]
+            payload: Dict = {
+                'versionCode': target['versionCode'],
+                'versionName': target['versionName'],
+                'downloadUrl': target['downloadUrl'],
+                'releaseNotes': target['releaseNotes'],
+                'isForceUpdate': target.get('isForceUpdate', False)
+            }
+            apk = rendered.manifests.get(name)
+            if apk is not None:
+                # Facts read from the APK itself by the indexer
+                payload.update({
+                    'apkSize': apk['size'],
+                    'apkSha256': apk['sha256'],
+                    'minSdk': apk.get('minSdk'),
+                    'abis': apk.get('abis', [])
+                })
+            if patch_from is not None:
+                patch = rendered.patches[(patch_from, name)]
+                payload.update({
+                    'patchUrl': f"{self.patch_url_prefix}/{patch_from}/{name}",
+                    'patchSize': patch['size'],
+                    'patchSha256': patch['sha256']
+                })
+        else:
+            payload = {
+                'message': 'No update available',
+                'currentVersion': name,
+                'latestVersion': detail or name,
+                'hasUpdate': False
+            }
+        body = encode_payload(payload, media_type)
+        etag = f'{rendered.revision}-{zlib.crc32(body):08x}'
+        return body, etag
\ No newline at end of file
@@ -2,48 +2,268 @@
 API Routes for SnapUpdate Backend
 """
 
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, Response, current_app, g, jsonify, request, send_file
 import os
 import sys
+import time
+import io
+import json
+import bisect
+from typing import Optional
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from data.version_manager import VersionManager
+from data.apk_manifest import is_compatible
+from data.metrics import metrics, record_exception
+from data.rollout import parse_cohorts, parse_percentage
+from data.storage import DEFAULT_APP_ID
+from data.version_manager import CatalogRegistry
+from .responses import BATCH_MAX_BYTES, BATCH_MAX_DEVICES, PATCH_URL_PREFIX, UpdateResponseCache, parse_abis
+from .load_control import LoadController
+from .startup import startup
+from .encoding import JSON_TYPE, CompressedBodyCache, compress_response, negotiate_media_type
+from .pagination import decode_cursor, encode_cursor, listing_response, parse_fields, parse_limit
+from .streaming import (SSE_HEADERS, SSE_HEARTBEAT, STREAM_HEARTBEAT, STREAM_MAX_SECONDS,
+                        parse_wait, sse_event, sse_retry, wants_event_stream)
 
 # Create blueprint
 api_bp = Blueprint('api', __name__)
 
-# Initialize version manager
-version_manager = VersionManager()
+# One catalog per (appId, channel); the unprefixed routes serve the default app's stable channel
+# Opened on first use (or by the background warm-up), so importing the blueprint touches no catalog
+catalogs = CatalogRegistry()
+update_responses = {}
+compressed_bodies = CompressedBodyCache()
+load_controller = LoadController()
+
+# Read buffer for NDJSON batch bodies
+BATCH_READ_SIZE = 64 * 1024
+
+class BodyTooLarge(ValueError):
+    """A bulk request body above its byte cap (answered with 413)"""
+
+# Byte caps of request bodies, per endpoint
+BODY_LIMITS = {'api.check_update_batch': BATCH_MAX_BYTES}
+
+@api_bp.url_value_preprocessor
+def _pop_app_id(endpoint, values):
+    """Namespaced routes (/apps/<app_id>/...) share the legacy view functions"""
+    g.app_id = values.pop('app_id', None) if values else None
+
+@api_bp.before_request
+def _select_catalog():
+    """Resolve the catalog a request targets from the app in the path and ?channel= (or "channel" in a JSON body)"""
+    if request.endpoint == 'api.list_apps':
+        return None
+    channel = request.args.get('channel')
+    if channel is None and request.is_json:
+        try:
+            data = _json_body()
+        except BodyTooLarge as e:
+            return jsonify({'error': str(e)}), 413
+        channel = data.get('channel') if isinstance(data, dict) else None
+    try:
+        g.version_manager = catalogs.get(g.app_id, channel)
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 404
+
+@api_bp.after_request
+def _compress(response):
+    """gzip/brotli JSON bodies for clients that accept it; views may set g.compress_key to reuse compressed bodies"""
+    return compress_response(response, request.headers.get('Accept-Encoding'), compressed_bodies,
+                             g.get('compress_key'))
+
+def server_error(error: Exception):
+    """500 JSON answer for an exception a view caught, counted in the metrics"""
+    record_exception(request.endpoint, error)
+    return jsonify({'error': str(error)}), 500
+
+def get_update_responses(manager) -> UpdateResponseCache:
+    """Pre-rendered /update responses of one catalog"""
+    key = (manager.app_id, manager.channel)
+    cache = update_responses.get(key)
+    if cache is None:
+        prefix = PATCH_URL_PREFIX if manager.app_id == DEFAULT_APP_ID else f'/api/v1/apps/{manager.app_id}/patch'
+        cache = update_responses.setdefault(key, UpdateResponseCache(manager, prefix))
+    return cache
+
+def warm_up_catalog():
+    """Load the default catalog, its APK and patch indexes and render its common /update answers"""
+    manager = catalogs.get()
+    manager.get_apk_manifests()
+    get_update_responses(manager).warm()
 
 @api_bp.route('/update', methods=['GET'])
+@api_bp.route('/apps/<app_id>/update', methods=['GET'])
 def check_update():
     """Endpoint to check for app updates"""
+    started = time.perf_counter()
     try:
-        current_version = request.args.get('version', '1.0')
-        latest_version = version_manager.get_latest_version()
+        # Under overload, tell clients to come back later instead of doing the work
+        retry_after = load_controller.retry_after()
+        if retry_after is not None:
+            return jsonify({'error': 'Server busy', 'retryAfterSeconds': retry_after}), 503, {'Retry-After': str(retry_after)}
         
-        # Check if we have a latest version and if it's different from current
-        if latest_version and latest_version['versionName'] != current_version:
-            # Use GitHub download URL directly
-            download_url = latest_version['downloadUrl']
-            
-            return jsonify({
-                'versionCode': latest_version['versionCode'],
-                'versionName': latest_version['versionName'],
-                'downloadUrl': download_url,
-                'releaseNotes': latest_version['releaseNotes'],
-                'isForceUpdate': latest_version.get('isForceUpdate', False)
-            })
+        current_code = request.args.get('versionCode', type=int)
+        current_version = request.args.get('version', '1.0' if current_code is None else None)
+        media_type = negotiate_media_type(request.headers.get('Accept'))
+        g.version_manager.increment_stat('update_checks')
+        body, etag = get_update_responses(g.version_manager).get(
+            current_version, current_code, request.args.get('deviceId'), request.args.get('cohort'),
+            media_type, request.args.get('sdk', type=int), parse_abis(request.args.get('abi')))
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache', 'Vary': 'Accept', **load_controller.hint_headers()}
+        
+        # Answer polls that already hold this exact response without a body
+        if request.if_none_match.contains_weak(etag):
+            return Response(status=304, headers=headers)
+        return Response(body, mimetype=media_type, headers=headers)
+        
+    except Exception as e:
+        return server_error(e)
+    finally:
+        load_controller.record(time.perf_counter() - started)
+
+@api_bp.route('/update/batch', methods=['POST'])
+@api_bp.route('/apps/<app_id>/update/batch', methods=['POST'])
+def check_update_batch():
+    """Answer many devices against one catalog snapshot, streamed as NDJSON grouped by current version"""
+    try:
+        devices = _json_records('devices', BATCH_MAX_DEVICES)
+    except BodyTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        manager = g.version_manager
+        responses = get_update_responses(manager)
+        # One snapshot for the whole batch, even if the catalog changes while the answer streams
+        catalog = manager.get_catalog()
+        patches = manager.patches.index()
+        manifests = manager.get_apk_manifests()
+        manager.increment_stat('update_checks', len(devices))
+        manager.increment_stat('batch_update_checks')
+        return Response(responses.batch(catalog, patches, manifests, devices), mimetype='application/x-ndjson',
+                        headers={'Cache-Control': 'no-store', **load_controller.hint_headers()})
+    except Exception as e:
+        return server_error(e)
+
+def _body_limit() -> Optional[int]:
+    """Byte cap of this request's body; a larger one is rejected before (or, without Content-Length, while) it is read"""
+    max_bytes = BODY_LIMITS.get(request.endpoint)
+    if max_bytes is not None and (request.content_length or 0) > max_bytes:
+        raise BodyTooLarge(f'Request body above {max_bytes} bytes')
+    return max_bytes
+
+def _json_body():
+    """The parsed JSON body (None if it is not valid JSON), read once per request within the endpoint's byte cap"""
+    if 'json_body' not in g:
+        max_bytes = _body_limit()
+        if max_bytes is None:
+            g.json_body = request.get_json(silent=True)
         else:
-            # Return 200 with no update message when versions are the same
-            return jsonify({
-                'message': 'No update available',
-                'currentVersion': current_version,
-                'latestVersion': latest_version['versionName'] if latest_version else current_version,
-                'hasUpdate': False
-            }), 200
+            body = request.stream.read(max_bytes + 1)
+            if len(body) > max_bytes:
+                raise BodyTooLarge(f'Request body above {max_bytes} bytes')
+            try:
+                g.json_body = json.loads(body)
+            except ValueError:
+                g.json_body = None
+    return g.json_body
+
+def _json_records(field: str, limit: Optional[int] = None) -> list:
+    """Records of a bulk body: a JSON list, {field: [...]}, or NDJSON with one record per line.
+    Parsed up front so a client that sends its whole body before reading is never blocked by the answer."""
+    if request.mimetype == 'application/x-ndjson':
+        max_bytes = _body_limit()
+        records = []
+        read = 0
+        # The raw input stream reads lines byte by byte
+        for number, line in enumerate(io.BufferedReader(request.stream, BATCH_READ_SIZE), 1):
+            read += len(line)
+            if max_bytes is not None and read > max_bytes:
+                raise BodyTooLarge(f'Request body above {max_bytes} bytes')
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                raise ValueError(f'Invalid JSON on line {number}')
+            if limit is not None and len(records) > limit:
+                break
+    else:
+        data = _json_body() if request.is_json else None
+        records = data.get(field) if isinstance(data, dict) else data
+        if not isinstance(records, list):
+            raise ValueError(f'Expected a JSON list, {{"{field}": [...]}}, or NDJSON')
+    if limit is not None and len(records) > limit:
+        raise ValueError(f'At most {limit} {field} per request')
+    return records
+
+@api_bp.route('/update/stream', methods=['GET'])
+@api_bp.route('/apps/<app_id>/update/stream', methods=['GET'])
+def stream_update():
+    """Push the update answer when the catalog changes: Server-Sent Events, or a long poll with ?wait=<seconds>"""
+    try:
+        wait = parse_wait(request.args.get('wait'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        manager = g.version_manager
+        responses = get_update_responses(manager)
+        current_code = request.args.get('versionCode', type=int)
+        current_version = request.args.get('version', '1.0' if current_code is None else None)
+        device_id = request.args.get('deviceId')
+        cohort = request.args.get('cohort')
+        sdk = request.args.get('sdk', type=int)
+        abis = parse_abis(request.args.get('abi'))
+        event_stream = wants_event_stream(request.headers.get('Accept'))
+        media_type = JSON_TYPE if event_stream else negotiate_media_type(request.headers.get('Accept'))
+        
+        def answer():
+            return responses.get(current_version, current_code, device_id, cohort, media_type, sdk, abis)
+        
+        manager.increment_stat('update_streams')
+        if event_stream:
+            return Response(_event_stream(manager, answer, request.headers.get('Last-Event-ID')),
+                            mimetype='text/event-stream', headers=SSE_HEADERS)
+        
+        # Long poll: answer as soon as the client's ETag is stale, or 304 when the wait runs out
+        key = (manager.app_id, manager.channel)
+        deadline = time.monotonic() + wait
+        while True:
+            generation = manager.notifier.generation(key)
+            body, etag = answer()
+            headers = {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache', 'Vary': 'Accept', **load_controller.hint_headers()}
+            if not request.if_none_match.contains_weak(etag):
+                return Response(body, mimetype=media_type, headers=headers)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return Response(status=304, headers=headers)
+            manager.notifier.wait(key, generation, remaining)
             
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return server_error(e)
+
+def _event_stream(manager, answer, last_event_id):
+    """Send the current answer (unless the client already has it), then one event per catalog change"""
+    key = (manager.app_id, manager.channel)
+    deadline = time.monotonic() + STREAM_MAX_SECONDS
+    sent = last_event_id
+    yield sse_retry()
+    generation = None
+    while True:
+        current = manager.notifier.generation(key)
+        if current != generation:
+            generation = current
+            body, etag = answer()
+            if etag != sent:
+                yield sse_event(body, etag)
+                sent = etag
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        if manager.notifier.wait(key, generation, min(STREAM_HEARTBEAT, remaining)) == generation:
+            yield SSE_HEARTBEAT
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
@@ -51,27 +271,59 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'server_version': '1.0.0',
-        'uptime': 'running'
+        'uptime': round(time.time() - metrics.started, 1),
+        'startup': startup.report()
     })
 
+@api_bp.route('/apps', methods=['GET'])
+def list_apps():
+    """List the apps served by this server and their release channels"""
+    return jsonify({'apps': catalogs.list_apps()})
+
 @api_bp.route('/versions', methods=['GET'])
+@api_bp.route('/apps/<app_id>/versions', methods=['GET'])
 def get_all_versions():
-    """Get all available versions"""
+    """Get available versions ordered by versionCode (optionally paginated and projected)"""
     try:
-        versions = version_manager.get_all_versions()
-        return jsonify({
-            'versions': versions,
-            'total': len(versions)
-        })
+        limit = parse_limit(request.args)
+        fields = parse_fields(request.args)
+        after_code = request.args.get('since_version_code', type=int)
+        cursor = request.args.get('cursor')
+        if cursor:
+            cursor_code = decode_cursor(cursor)
+            if not isinstance(cursor_code, int):
+                raise ValueError('Invalid cursor')
+            after_code = max(cursor_code, after_code if after_code is not None else cursor_code)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        # Taken before the page is built: a body is never cached under a newer catalog than its own
+        catalog = g.version_manager.get_catalog()
+        g.compress_key = (('versions', g.version_manager.app_id, g.version_manager.channel), catalog, request.full_path)
+        versions, next_after = g.version_manager.get_versions_page(after_code, limit)
+        # total stays the catalog size for existing clients; count is the size of this page
+        return listing_response('versions', versions, {
+            'total': len(catalog.versions),
+            'count': len(versions),
+            'nextCursor': encode_cursor(next_after) if next_after is not None else None
+        }, fields)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return server_error(e)
 
 @api_bp.route('/download/<version>', methods=['GET'])
+@api_bp.route('/apps/<app_id>/download/<version>', methods=['GET'])
 def download_apk(version):
-    """Redirect to GitHub download for specific version"""
+    """Serve the APK for a version (SERVE_APKS mode) or redirect to its GitHub download"""
     try:
-        version_info = version_manager.get_version(version)
+        if current_app.config.get('SERVE_APKS'):
+            apk_info = g.version_manager.get_apk_info(version)
+            if apk_info:
+                return _send_apk(apk_info)
+        
+        version_info = g.version_manager.get_version(version)
         if version_info and version_info.get('downloadUrl'):
+            g.version_manager.increment_stat('downloads')
             # Redirect to GitHub download URL
             return jsonify({
                 'redirect': True,
@@ -81,30 +333,118 @@ def download_apk(version):
         else:
             return jsonify({'error': 'Version not found'}), 404
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return server_error(e)
+
+def _send_apk(apk_info):
+    """Stream an APK via wsgi.file_wrapper (sendfile) with Range, ETag and Last-Modified support"""
+    response = send_file(
+        apk_info['path'],
+        mimetype='application/vnd.android.package-archive',
+        as_attachment=True,
+        download_name=apk_info['filename'],
+        conditional=True,
+        etag=apk_info['sha256'],
+        last_modified=apk_info['mtime'],
+        max_age=3600
+    )
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['X-Checksum-SHA256'] = apk_info['sha256']
+    
+    # Resumed (206) and revalidated (304) downloads are not counted again
+    if response.status_code == 200:
+        g.version_manager.increment_stat('downloads')
+    return response
+
+@api_bp.route('/patch/<from_version>/<to_version>', methods=['GET'])
+@api_bp.route('/apps/<app_id>/patch/<from_version>/<to_version>', methods=['GET'])
+def download_patch(from_version, to_version):
+    """Serve a cached delta patch between two APK versions"""
+    try:
+        patch = g.version_manager.get_patch(from_version, to_version)
+        if not patch:
+            return jsonify({'error': 'Patch not found'}), 404
+        response = send_file(
+            g.version_manager.patches.patch_path(from_version, to_version),
+            mimetype='application/octet-stream',
+            as_attachment=True,
+            download_name=patch['filename'],
+            conditional=True,
+            etag=patch['sha256'],
+            max_age=3600
+        )
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.headers['X-Checksum-SHA256'] = patch['sha256']
+        return response
+    except Exception as e:
+        return server_error(e)
 
 @api_bp.route('/stats', methods=['GET'])
+@api_bp.route('/apps/<app_id>/stats', methods=['GET'])
 def get_stats():
     """Get server statistics"""
     try:
-        stats = version_manager.get_stats()
+        stats = g.version_manager.get_stats()
         return jsonify(stats)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return server_error(e)
 
 @api_bp.route('/apks/available', methods=['GET'])
+@api_bp.route('/apps/<app_id>/apks/available', methods=['GET'])
 def get_available_apks():
-    """Get all available APK files on server"""
+    """Get available APK files on server (optionally paginated, filtered by device SDK/ABI, with indexed metadata)"""
     try:
-        available_apks = version_manager.get_all_available_apks()
-        return jsonify({
-            'available_apks': available_apks,
-            'total_apks': len(available_apks)
+        limit = parse_limit(request.args)
+        details = request.args.get('details', 'false').lower() == 'true'
+        sdk = request.args.get('sdk', type=int)
+        abis = parse_abis(request.args.get('abi'))
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None and not isinstance(after, str):
+            raise ValueError('Invalid cursor')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        available_apks = g.version_manager.apk_index.versions()
+        manifests = g.version_manager.get_apk_manifests()
+        # The manifest dict is replaced whenever the listing or an indexed entry changes
+        g.compress_key = (('apks', g.version_manager.app_id), manifests, request.full_path)
+        if sdk is not None or abis:
+            available_apks = [v for v in available_apks if is_compatible(manifests.get(v), sdk, abis)]
+        start = bisect.bisect_right(available_apks, after) if after is not None else 0
+        end = len(available_apks) if limit is None else min(start + limit, len(available_apks))
+        page = available_apks[start:end]
+        if details:
+            page = [_apk_details(version, manifests.get(version)) for version in page]
+        return listing_response('available_apks', page, {
+            'total_apks': len(available_apks),
+            'count': len(page),
+            'nextCursor': encode_cursor(page[-1]) if page and end < len(available_apks) else None
         })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return server_error(e)
+
+def _apk_details(version: str, meta):
+    """Listing entry with the indexer's metadata (indexed: false until the background pool has read the file)"""
+    if meta is None:
+        return {'version': version, 'indexed': False}
+    return {
+        'version': version,
+        'indexed': True,
+        'size': meta['size'],
+        'sha256': meta['sha256'],
+        'packageName': meta.get('packageName'),
+        'versionCode': meta.get('versionCode'),
+        'versionName': meta.get('versionName'),
+        'minSdk': meta.get('minSdk'),
+        'targetSdk': meta.get('targetSdk'),
+        'abis': meta.get('abis', []),
+        'signatureScheme': meta.get('signatureScheme'),
+        'signerSha256': meta.get('signerSha256', [])
+    }
 
 @api_bp.route('/version/increment', methods=['POST'])
+@api_bp.route('/apps/<app_id>/version/increment', methods=['POST'])
 def increment_version():
     """Increment server version with GitHub download link"""
     try:
@@ -113,14 +453,18 @@ def increment_version():
         release_notes = data.get('releaseNotes', '')
         is_force_update = data.get('isForceUpdate', False)
         
-        # GitHub download URL will be created in version_manager.add_version()
-        
-        if version_manager.add_version({
+        # The app's download URL and the next versionCode are assigned in VersionManager.add_version()
+        version_data = {
             'versionName': new_version,
-            'versionCode': version_manager.get_next_version_code(),
             'releaseNotes': release_notes,
             'isForceUpdate': is_force_update
-        }):
+        }
+        if 'rolloutPercentage' in data:
+            version_data['rolloutPercentage'] = parse_percentage(data['rolloutPercentage'])
+        if 'rolloutCohorts' in data:
+            version_data['rolloutCohorts'] = parse_cohorts(data['rolloutCohorts'], 'rolloutCohorts')
+        
+        if g.version_manager.add_version(version_data):
             return jsonify({
                 'success': True,
                 'message': f'Version {new_version} created successfully',
@@ -129,24 +473,73 @@ def increment_version():
         else:
             return jsonify({'error': 'Failed to create version'}), 400
             
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return server_error(e)
+
+@api_bp.route('/versions/publish', methods=['POST'])
+@api_bp.route('/apps/<app_id>/versions/publish', methods=['POST'])
+def publish_versions():
+    """Validate and add many versions as one catalog revision; ?dry_run=true only reports the plan and conflicts"""
+    try:
+        releases = _json_records('versions')
+        if not releases:
+            raise ValueError('No versions to publish')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        dry_run = request.args.get('dry_run', 'false').lower() == 'true'
+        result = g.version_manager.publish_versions(releases, dry_run)
+        if result['conflicts']:
+            return jsonify({'success': False, **result}), 409
+        return jsonify({'success': True, **result})
+    except Exception as e:
+        return server_error(e)
+
+@api_bp.route('/version/<version>/rollout', methods=['POST'])
+@api_bp.route('/apps/<app_id>/version/<version>/rollout', methods=['POST'])
+def set_version_rollout(version):
+    """Raise or lower the staged rollout percentage (and cohorts) of a version"""
+    try:
+        data = request.get_json() or {}
+        try:
+            percentage = parse_percentage(data.get('percentage'))
+            cohorts = parse_cohorts(data['cohorts']) if data.get('cohorts') is not None else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if g.version_manager.set_rollout(version, percentage, cohorts):
+            return jsonify({
+                'success': True,
+                'version': version,
+                'rolloutPercentage': percentage,
+                'rolloutCohorts': g.version_manager.get_version(version).get('rolloutCohorts', [])
+            })
+        else:
+            return jsonify({'error': 'Version not found'}), 404
+            
+    except Exception as e:
+        return server_error(e)
 
 @api_bp.route('/version/current', methods=['GET'])
+@api_bp.route('/apps/<app_id>/version/current', methods=['GET'])
 def get_current_server_version():
     """Get current server version"""
     try:
-        latest = version_manager.get_latest_version()
+        latest = g.version_manager.get_latest_version()
         return jsonify({
             'currentVersion': latest['versionName'] if latest else '1.0',
             'versionCode': latest['versionCode'] if latest else 1,
             'releaseNotes': latest['releaseNotes'] if latest else '',
             'isForceUpdate': latest.get('isForceUpdate', False) if latest else False
-        })
+        }), 200, load_controller.hint_headers()
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return server_error(e)
 
 @api_bp.route('/version/reset', methods=['POST'])
+@api_bp.route('/apps/<app_id>/version/reset', methods=['POST'])
 def reset_version():
     """Reset server version to start new cycle with GitHub download link"""
     try:
@@ -155,13 +548,13 @@ def reset_version():
         reason = data.get('reason', 'Reset to start new version cycle')
         
         # Get current version before reset
-        current_version = version_manager.get_latest_version()
+        current_version = g.version_manager.get_latest_version()
         previous_version = current_version['versionName'] if current_version else '1.0'
         
-        # GitHub download URL will be created in version_manager.reset_to_version()
+        # The app's download URL will be created in VersionManager.reset_to_version()
         
         # Reset to target version
-        if version_manager.reset_to_version({
+        if g.version_manager.reset_to_version({
             'versionName': target_version,
             'versionCode': 1,  # Reset version code to 1
             'releaseNotes': f"{reason} - Reset to {target_version}",
@@ -177,4 +570,4 @@ def reset_version():
             return jsonify({'error': 'Failed to reset version'}), 400
             
     except Exception as e:
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        return server_error(e) 
\ No newline at end of file
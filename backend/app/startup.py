@@ -0,0 +1,73 @@
+"""
+Startup timing for SnapUpdate Backend
+Per-phase durations of a worker's start (imports, app factory, blueprints, catalog warm-up),
+logged once and reported on /health
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+class StartupTimer:
+    """Durations of the startup phases, measured from the moment the app package starts importing"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.first_response = None
+        self.warm = threading.Event()
+    
+    def elapsed(self) -> float:
+        """Seconds since the app package started importing"""
+        return time.perf_counter() - self.started
+    
+    def record(self, name: str, seconds: float):
+        """Store the duration of one phase"""
+        self.phases[name] = seconds
+    
+    @contextmanager
+    def measure(self, name: str):
+        """Time the enclosed block as one phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+    
+    def warm_up(self, load: Callable[[], None]) -> threading.Thread:
+        """Run the catalog load in a background thread, so the worker serves requests while it runs"""
+        def run():
+            try:
+                with self.measure('catalog_load'):
+                    load()
+            except Exception as e:
+                print(f"Error warming up catalog: {e}")
+            finally:
+                self.warm.set()
+                print(f"⏱️ Startup phases: {self._summary()}")
+        
+        thread = threading.Thread(target=run, name='catalog-warmup', daemon=True)
+        thread.start()
+        return thread
+    
+    def responded(self):
+        """Note the first response of this worker (called per request; a single check after the first)"""
+        if self.first_response is None:
+            self.first_response = self.elapsed()
+            print(f"⏱️ First response {self.first_response * 1000:.1f}ms after startup "
+                  f"({'warm' if self.warm.is_set() else 'catalog still warming'})")
+    
+    def report(self) -> Dict:
+        """Phase timings (ms) for /health"""
+        return {
+            'phases_ms': {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            'catalog_warm': self.warm.is_set(),
+            'first_response_ms': round(self.first_response * 1000, 1) if self.first_response is not None else None
+        }
+    
+    def _summary(self) -> str:
+        return ', '.join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in self.phases.items())
+
+# Created when the app package is first imported, before Flask is
+startup = StartupTimer()
\ No newline at end of file
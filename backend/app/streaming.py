@@ -0,0 +1,39 @@
+"""
+Update stream helpers for SnapUpdate Backend
+Shared by the Flask and ASGI /update/stream handlers (Server-Sent Events and long polling)
+"""
+
+import os
+import math
+from typing import Optional
+
+STREAM_HEARTBEAT = float(os.getenv('STREAM_HEARTBEAT_SECONDS', 15))
+STREAM_MAX_SECONDS = float(os.getenv('STREAM_MAX_SECONDS', 300))
+STREAM_RETRY_MS = int(os.getenv('STREAM_RETRY_MS', 5000))
+LONG_POLL_MAX_WAIT = 60.0
+SSE_HEARTBEAT = b': keep-alive\n\n'
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+def wants_event_stream(accept: Optional[str]) -> bool:
+    """SSE for EventSource clients (Accept: text/event-stream), long polling otherwise"""
+    return bool(accept) and 'text/event-stream' in accept
+
+def parse_wait(value: Optional[str]) -> float:
+    """Long-poll wait in seconds (?wait=), capped at LONG_POLL_MAX_WAIT"""
+    if value is None:
+        return LONG_POLL_MAX_WAIT
+    try:
+        wait = float(value)
+    except ValueError:
+        raise ValueError('wait must be a number of seconds')
+    if not math.isfinite(wait) or wait < 0:
+        raise ValueError('wait must be a number of seconds')
+    return min(wait, LONG_POLL_MAX_WAIT)
+
+def sse_retry() -> bytes:
+    """Reconnect delay for EventSource once the server closes the stream"""
+    return f"retry: {STREAM_RETRY_MS}\n\n".encode()
+
+def sse_event(body: bytes, etag: str) -> bytes:
+    """One update event; the ETag doubles as the event id so reconnects resume with Last-Event-ID"""
+    return b'id: ' + etag.encode() + b'\nevent: update\ndata: ' + body + b'\n\n'
\ No newline at end of file
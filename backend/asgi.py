@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for SnapUpdate Backend
+Run with any ASGI server, e.g. uvicorn asgi:application --workers 4
+"""
+
+import sys
+import os
+
+# Make the app and data packages importable from any working directory
+path = os.path.dirname(os.path.abspath(__file__))
+if path not in sys.path:
+    sys.path.append(path)
+
+from app.asgi import create_asgi_app
+
+application = create_asgi_app()
\ No newline at end of file
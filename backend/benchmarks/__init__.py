@@ -0,0 +1,4 @@
+"""
+Benchmarks for SnapUpdate Backend
+Run from the backend directory, e.g. python -m benchmarks.asgi_vs_wsgi
+"""
\ No newline at end of file
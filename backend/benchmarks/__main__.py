@@ -0,0 +1,96 @@
+"""
+Benchmark runner for SnapUpdate Backend
+
+    python -m benchmarks run --suite micro,load,startup --output results.json
+    python -m benchmarks compare baseline.json results.json --threshold 0.10
+
+Everything runs against a scratch copy of the data directory, so the real catalog and stats are never touched.
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from .harness import compare_results, print_results, run_metadata, scratch_data_dir, write_results
+from .micro import DEFAULT_SIZES, bench_version_manager
+from .load import SCENARIOS, TRANSPORTS, bench_load
+from .startup import bench_startup
+
+SUITES = ('micro', 'load', 'startup')
+
+def _csv(value: str):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def run(args) -> int:
+    suites = _csv(args.suite)
+    unknown = set(suites) - set(SUITES) | set(_csv(args.transport)) - set(TRANSPORTS) | set(_csv(args.scenario)) - set(SCENARIOS)
+    if unknown:
+        print(f"❌ Unknown option(s): {', '.join(sorted(unknown))}")
+        return 2
+    
+    results = []
+    with scratch_data_dir() as data_dir:
+        print(f"📁 Scratch data directory: {data_dir}")
+        # The suites import data/app lazily, after SNAPUPDATE_DATA_DIR points at the scratch copy
+        if 'micro' in suites:
+            sizes = [int(size) for size in _csv(args.sizes)]
+            print(f"📊 VersionManager micro-benchmarks (catalog sizes {', '.join(map(str, sizes))})")
+            micro = bench_version_manager(sizes, args.iterations)
+            print_results(micro)
+            results += micro
+        if 'load' in suites:
+            print(f"📊 Load scenarios ({args.catalog_size} versions, {args.requests} requests, {args.concurrency} clients)")
+            load = bench_load(_csv(args.scenario), _csv(args.transport), args.catalog_size, args.requests, args.concurrency)
+            print_results(load)
+            results += load
+        if 'startup' in suites:
+            print(f"📊 Cold starts ({args.startup_runs} fresh workers, {args.catalog_size} versions)")
+            startup = bench_startup(args.startup_runs, args.catalog_size)
+            print_results(startup)
+            results += startup
+    
+    if args.output:
+        write_results(args.output, results, run_metadata(vars(args)))
+        print(f"💾 Results written to {args.output}")
+    failed = [r['name'] for r in results if r.get('errors') or r.get('duplicate_codes')]
+    if failed:
+        print(f"❌ Failures in: {', '.join(failed)}")
+        return 1
+    return 0
+
+def compare(args) -> int:
+    regressions = compare_results(args.baseline, args.current, args.threshold)
+    if regressions:
+        print(f"❌ {regressions} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    print(f"✅ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="SnapUpdate benchmark suite")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = subparsers.add_parser('run', help="Run benchmark suites")
+    run_parser.add_argument('--suite', default=','.join(SUITES), help="Comma-separated suites: micro, load, startup")
+    run_parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help="Micro: catalog sizes")
+    run_parser.add_argument('--iterations', type=int, default=2000, help="Micro: calls per benchmark")
+    run_parser.add_argument('--scenario', default=','.join(SCENARIOS), help="Load: comma-separated scenarios")
+    run_parser.add_argument('--transport', default=','.join(TRANSPORTS), help="Load: test client and/or local server")
+    run_parser.add_argument('--catalog-size', type=int, default=1000, help="Load/startup: versions in the seeded catalog")
+    run_parser.add_argument('--requests', type=int, default=2000, help="Load: requests per scenario")
+    run_parser.add_argument('--concurrency', type=int, default=32, help="Load: concurrent clients")
+    run_parser.add_argument('--startup-runs', type=int, default=5, help="Startup: workers spawned")
+    run_parser.add_argument('--output', help="Write results as JSON to this file")
+    
+    compare_parser = subparsers.add_parser('compare', help="Compare two result files")
+    compare_parser.add_argument('baseline', help="Earlier results JSON")
+    compare_parser.add_argument('current', help="Newer results JSON")
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help="Relative slowdown counted as a regression")
+    
+    args = parser.parse_args(argv)
+    return run(args) if args.command == 'run' else compare(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
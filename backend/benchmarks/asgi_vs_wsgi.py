@@ -0,0 +1,120 @@
+"""
+Update-check throughput and latency: ASGI entry point vs the threaded WSGI path
+Both apps are driven in-process, so the numbers exclude socket and HTTP parsing costs;
+they serve the demo catalog from a scratch data directory, so real stats are never touched
+
+    python -m benchmarks.asgi_vs_wsgi --requests 20000 --concurrency 1000 --threads 16
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from .harness import scratch_data_dir, summarize
+
+UPDATE_PATH = '/api/v1/update'
+UPDATE_QUERY = 'version=1.0'
+
+def run_wsgi(wsgi_app, requests: int, concurrency: int, threads: int) -> Dict:
+    """Clients queue for a fixed pool of worker threads, like a threaded WSGI server"""
+    environ = {
+        'REQUEST_METHOD': 'GET', 'SCRIPT_NAME': '', 'PATH_INFO': UPDATE_PATH, 'QUERY_STRING': UPDATE_QUERY,
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False
+    }
+    in_flight = threading.BoundedSemaphore(concurrency)
+    latencies = []
+    
+    def request(queued_at: float):
+        try:
+            result = wsgi_app(dict(environ), lambda status, headers, exc_info=None: None)
+            b''.join(result)
+            if hasattr(result, 'close'):
+                result.close()
+            latencies.append(time.perf_counter() - queued_at)
+        finally:
+            in_flight.release()
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for _ in range(requests):
+            in_flight.acquire()
+            pool.submit(request, time.perf_counter())
+    return summarize(f'wsgi ({threads} threads)', latencies, time.perf_counter() - started)
+
+def run_asgi(asgi_app, requests: int, concurrency: int) -> Dict:
+    """Clients are coroutines on one event loop, like keep-alive connections held by an ASGI server"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': UPDATE_PATH, 'raw_path': UPDATE_PATH.encode(), 'query_string': UPDATE_QUERY.encode(),
+        'root_path': '', 'headers': [(b'host', b'localhost')], 'server': ('localhost', 80), 'client': ('127.0.0.1', 0)
+    }
+    latencies = []
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    
+    async def send(message):
+        # A socket write yields to the loop, letting the other clients' requests interleave
+        await asyncio.sleep(0)
+    
+    async def client(count: int):
+        for _ in range(count):
+            queued_at = time.perf_counter()
+            await asgi_app(dict(scope), receive, send)
+            latencies.append(time.perf_counter() - queued_at)
+    
+    async def main():
+        # Warm the catalog view outside the timed run
+        await asgi_app(dict(scope), receive, send)
+        started = time.perf_counter()
+        share, extra = divmod(requests, concurrency)
+        await asyncio.gather(*(client(share + (i < extra)) for i in range(concurrency)))
+        return time.perf_counter() - started
+    
+    elapsed = asyncio.run(main())
+    return summarize('asgi (1 event loop)', latencies, elapsed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the ASGI and WSGI update-check paths")
+    parser.add_argument('--requests', type=int, default=20000, help="Update checks per run")
+    parser.add_argument('--concurrency', type=int, default=1000, help="Concurrent clients")
+    parser.add_argument('--threads', type=int, default=16, help="WSGI worker threads")
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args(argv)
+    
+    with scratch_data_dir():
+        # Imported once SNAPUPDATE_DATA_DIR points at the scratch directory
+        from app import create_app
+        from app.asgi import create_asgi_app
+        from data.version_manager import VersionManager
+        
+        VersionManager().seed_demo_data()
+        wsgi_app = create_app()
+        # Warm the catalog and response cache outside the timed runs
+        wsgi_app.test_client().get(f'{UPDATE_PATH}?{UPDATE_QUERY}')
+        results = [
+            run_wsgi(wsgi_app, args.requests, args.concurrency, args.threads),
+            run_asgi(create_asgi_app(wsgi_app), args.requests, args.concurrency)
+        ]
+    
+    print(f"📊 {args.requests} update checks, {args.concurrency} concurrent clients")
+    for result in results:
+        print(f"   {result['name']:<22} {result['requests_per_second']:>10} req/s"
+              f"   p50 {result['p50_ms']:>8} ms   p99 {result['p99_ms']:>8} ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
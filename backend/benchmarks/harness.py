@@ -0,0 +1,173 @@
+"""
+Benchmark harness for SnapUpdate Backend
+Timing, concurrency, scratch data directories and JSON results that can be compared between runs
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import threading
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+def synthetic_versions(count: int) -> Dict[str, Dict]:
+    """Catalog records shaped like real ones, with semver names increasing with versionCode"""
+    versions = {}
+    for code in range(1, count + 1):
+        name = f"{code // 10000}.{code // 100 % 100}.{code % 100}"
+        versions[name] = {
+            'versionCode': code,
+            'versionName': name,
+            'releaseNotes': f"Release {name}: bug fixes and performance improvements",
+            'downloadUrl': f"https://github.com/kariemSeiam/snapupdate/raw/refs/heads/master/backend/data/apks/SnapUpdate-v{name}.apk",
+            'isForceUpdate': code % 10 == 0,
+            'createdAt': '2024-01-01T00:00:00Z'
+        }
+    return versions
+
+def summarize(name: str, latencies: List[float], elapsed: float, **extra) -> Dict:
+    """Throughput and latency percentiles (ms) of one run"""
+    latencies = sorted(latencies)
+    if not latencies:
+        return {'name': name, 'requests': 0, **extra}
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return {
+        'name': name,
+        'requests': len(latencies),
+        'requests_per_second': round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+        'p50_ms': round(pick(0.50), 4),
+        'p99_ms': round(pick(0.99), 4),
+        'max_ms': round(latencies[-1] * 1000, 4),
+        **extra
+    }
+
+def time_per_call(fn: Callable, iterations: int) -> float:
+    """Mean microseconds per call"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+def measure(name: str, fn: Callable, iterations: int, warmup: int = 10, **extra) -> Dict:
+    """Time fn sequentially, one latency sample per call"""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(name, latencies, time.perf_counter() - started, **extra)
+
+def run_concurrent(name: str, fn: Callable[[int], None], requests: int, concurrency: int, **extra) -> Dict:
+    """Call fn(i) for i in range(requests) from `concurrency` client threads; failures are counted, not raised"""
+    latencies = []
+    errors = []
+    counter = iter(range(requests))
+    lock = threading.Lock()
+    
+    def client():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            call_started = time.perf_counter()
+            try:
+                fn(index)
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            latencies.append(time.perf_counter() - call_started)
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    result = summarize(name, latencies, time.perf_counter() - started, concurrency=concurrency, errors=len(errors), **extra)
+    if errors:
+        result['first_error'] = errors[0]
+    return result
+
+@contextmanager
+def scratch_data_dir(seed_from: Optional[str] = None):
+    """Point SNAPUPDATE_DATA_DIR at a temp directory (optionally a copy of a data dir) for the duration.
+    Must be entered before `app` or `data` modules are imported, since they read it at import time."""
+    previous = os.environ.get('SNAPUPDATE_DATA_DIR')
+    root = tempfile.mkdtemp(prefix='snapupdate-bench-')
+    data_dir = os.path.join(root, 'data')
+    if seed_from:
+        shutil.copytree(seed_from, data_dir, ignore=shutil.ignore_patterns('stats.d', '*.lock', '__pycache__', '*.py'))
+    else:
+        os.makedirs(data_dir)
+    os.environ['SNAPUPDATE_DATA_DIR'] = data_dir
+    try:
+        yield data_dir
+    finally:
+        if previous is None:
+            os.environ.pop('SNAPUPDATE_DATA_DIR', None)
+        else:
+            os.environ['SNAPUPDATE_DATA_DIR'] = previous
+        shutil.rmtree(root, ignore_errors=True)
+
+def run_metadata(args: Dict) -> Dict:
+    """Environment details stored next to the results"""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                  capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'git_revision': revision,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'args': args
+    }
+
+def write_results(path: str, results: List[Dict], metadata: Dict):
+    """Store a run as JSON"""
+    with open(path, 'w') as f:
+        json.dump({'metadata': metadata, 'results': results}, f, indent=2)
+
+def print_results(results: List[Dict]):
+    """One line per benchmark"""
+    for result in results:
+        if not result.get('requests'):
+            print(f"   {result['name']:<48} (no samples)")
+            continue
+        errors = f"   errors {result['errors']}" if result.get('errors') else ''
+        print(f"   {result['name']:<48} {result['requests_per_second']:>11} ops/s"
+              f"   p50 {result['p50_ms']:>9} ms   p99 {result['p99_ms']:>9} ms{errors}")
+
+def compare_results(baseline_path: str, current_path: str, threshold: float = 0.10) -> int:
+    """Print per-benchmark changes between two result files; returns the number of regressions past threshold"""
+    with open(baseline_path, 'r') as f:
+        baseline = {result['name']: result for result in json.load(f)['results']}
+    with open(current_path, 'r') as f:
+        current = json.load(f)['results']
+    
+    regressions = 0
+    for result in current:
+        before = baseline.get(result['name'])
+        if before is None or not before.get('requests') or not result.get('requests'):
+            print(f"   {result['name']:<48} (new)")
+            continue
+        p50 = result['p50_ms'] / before['p50_ms'] - 1 if before['p50_ms'] else 0.0
+        p99 = result['p99_ms'] / before['p99_ms'] - 1 if before['p99_ms'] else 0.0
+        rate = (result['requests_per_second'] or 0) / before['requests_per_second'] - 1 if before['requests_per_second'] else 0.0
+        regressed = p50 > threshold or rate < -threshold
+        regressions += regressed
+        print(f"{'❌' if regressed else '  '} {result['name']:<48} p50 {p50:+7.1%}   p99 {p99:+7.1%}   ops/s {rate:+7.1%}")
+    return regressions
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""
+Concurrent load scenarios against the Flask app built by create_app()
+Each scenario runs through Flask's test client or a real local threaded WSGI server (keep-alive HTTP/1.1)
+Run through `python -m benchmarks run --suite load`; needs SNAPUPDATE_DATA_DIR pointing at a scratch directory
+"""
+
+import io
+import os
+import json
+import random
+import threading
+import http.client
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional, Tuple
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from .harness import run_concurrent, synthetic_versions
+
+TRANSPORTS = ('client', 'server')
+SCENARIOS = ('poll_storm', 'mixed', 'increment_storm', 'download')
+APK_SIZE = 4 * 1024 * 1024
+
+class ClientTransport:
+    """Flask test client, one per thread (no sockets, measures the app itself)"""
+    
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+    
+    def request(self, method: str, path: str, headers: Optional[Dict] = None, body: Optional[Dict] = None) -> Tuple[int, Dict, bytes]:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, headers=headers or {}, json=body)
+        data = response.get_data()
+        response.close()
+        return response.status_code, response.headers, data
+    
+    def close(self):
+        pass
+
+class _KeepAliveHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_request(self, *args, **kwargs):
+        pass
+
+class ServerTransport:
+    """Real threaded WSGI server on a free local port, one keep-alive connection per client thread"""
+    
+    def __init__(self, app):
+        self.server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=_KeepAliveHandler)
+        self.port = self.server.server_port
+        self._thread = threading.Thread(target=self.server.serve_forever, name='bench-server', daemon=True)
+        self._thread.start()
+        self._local = threading.local()
+    
+    def request(self, method: str, path: str, headers: Optional[Dict] = None, body: Optional[Dict] = None) -> Tuple[int, Dict, bytes]:
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                return response.status, dict(response.getheaders()), response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # The server may close an idle keep-alive connection; reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+    
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def prepare_catalog(catalog_size: int) -> List[str]:
+    """Seed the default catalog and an APK for the latest version in the scratch data dir"""
+    from data.storage import DATA_DIR, open_version_store
+    
+    versions = synthetic_versions(catalog_size)
+    with open_version_store().transaction() as versions_data:
+        versions_data.clear()
+        versions_data.update(versions)
+    
+    apk_dir = os.path.join(DATA_DIR, 'apks')
+    os.makedirs(apk_dir, exist_ok=True)
+    latest = list(versions)[-1]
+    with open(os.path.join(apk_dir, f"SnapUpdate-v{latest}.apk"), 'wb') as f:
+        f.write(os.urandom(APK_SIZE))
+    return list(versions)
+
+def _expect(status: int, *allowed: int):
+    if status not in allowed:
+        raise RuntimeError(f"Unexpected status {status}")
+
+def poll_storm(transport, names: List[str], requests: int, concurrency: int, name: str) -> Dict:
+    """Many devices polling /update; half of them revalidate with the ETag they already hold"""
+    etags = {}
+    
+    def poll(index: int):
+        version = names[index % len(names)]
+        headers = {'If-None-Match': etags[version]} if index % 2 and version in etags else {}
+        status, response_headers, _ = transport.request(
+            'GET', f'/api/v1/update?version={version}&deviceId=device-{index}', headers)
+        _expect(status, 200, 304)
+        etags[version] = response_headers.get('ETag')
+    
+    return run_concurrent(name, poll, requests, concurrency)
+
+def mixed(transport, names: List[str], requests: int, concurrency: int, name: str) -> Dict:
+    """Mostly reads (/update, /versions pages, /version/current, /download redirects) with 5% version creation"""
+    rng = random.Random(7)
+    plan = [rng.random() for _ in range(requests)]
+    
+    def step(index: int):
+        roll = plan[index]
+        if roll < 0.05:
+            status, _, _ = transport.request('POST', '/api/v1/version/increment', body={
+                'version': f'mixed-{index}', 'releaseNotes': 'Benchmark release'})
+            _expect(status, 200)
+        elif roll < 0.65:
+            status, _, _ = transport.request('GET', f'/api/v1/update?version={names[index % len(names)]}')
+            _expect(status, 200)
+        elif roll < 0.85:
+            status, _, _ = transport.request('GET', f'/api/v1/versions?limit=50&since_version_code={index % len(names)}')
+            _expect(status, 200)
+        elif roll < 0.95:
+            status, _, _ = transport.request('GET', '/api/v1/version/current')
+            _expect(status, 200)
+        else:
+            status, _, _ = transport.request('GET', f'/api/v1/download/{names[index % len(names)]}')
+            _expect(status, 200, 302)
+    
+    return run_concurrent(name, step, requests, concurrency)
+
+def increment_storm(transport, names: List[str], requests: int, concurrency: int, name: str) -> Dict:
+    """Concurrent POST /version/increment; every new version must get a distinct versionCode"""
+    created = []
+    
+    def increment(index: int):
+        version = f'storm-{index}'
+        status, _, _ = transport.request('POST', '/api/v1/version/increment', body={
+            'version': version, 'releaseNotes': 'Benchmark release'})
+        _expect(status, 200)
+        created.append(version)
+    
+    result = run_concurrent(name, increment, requests, concurrency)
+    _, _, body = transport.request('GET', '/api/v1/versions')
+    codes = [v['versionCode'] for v in json.loads(body)['versions'] if v['versionName'] in set(created)]
+    result['duplicate_codes'] = len(codes) - len(set(codes))
+    return result
+
+def download(transport, names: List[str], requests: int, concurrency: int, name: str) -> Dict:
+    """Full APK downloads of the latest version (SERVE_APKS mode), plus resumed range requests"""
+    latest = names[-1]
+    
+    def fetch(index: int):
+        headers = {'Range': f'bytes={APK_SIZE // 2}-'} if index % 4 == 3 else {}
+        status, _, body = transport.request('GET', f'/api/v1/download/{latest}', headers)
+        _expect(status, 200, 206)
+        if not body:
+            raise RuntimeError('Empty download')
+    
+    return run_concurrent(name, fetch, requests, concurrency, apk_bytes=APK_SIZE)
+
+def bench_load(scenarios=SCENARIOS, transports=TRANSPORTS, catalog_size: int = 1000,
+               requests: int = 2000, concurrency: int = 32) -> List[Dict]:
+    """Run each scenario over each transport against one seeded scratch catalog"""
+    names = prepare_catalog(catalog_size)
+    from app import create_app
+    
+    app = create_app()
+    app.config['SERVE_APKS'] = True
+    runners = {'poll_storm': poll_storm, 'mixed': mixed, 'increment_storm': increment_storm, 'download': download}
+    results = []
+    for transport_name in transports:
+        transport = ClientTransport(app) if transport_name == 'client' else ServerTransport(app)
+        try:
+            # Version writes print a line each; keep them out of the report
+            with redirect_stdout(io.StringIO()):
+                for scenario in scenarios:
+                    count = max(concurrency, requests // 10) if scenario in ('increment_storm', 'download') else requests
+                    results.append(runners[scenario](
+                        transport, names, count, concurrency, f'load.{scenario}[{transport_name}, c={concurrency}]'))
+        finally:
+            transport.close()
+    return results
\ No newline at end of file
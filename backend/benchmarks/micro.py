@@ -0,0 +1,58 @@
+"""
+VersionManager micro-benchmarks over synthetic catalogs (10 to 100k versions)
+Run through `python -m benchmarks run --suite micro`; needs SNAPUPDATE_DATA_DIR pointing at a scratch directory
+"""
+
+import io
+import random
+from contextlib import redirect_stdout
+from typing import Dict, List
+
+from .harness import measure, synthetic_versions
+
+DEFAULT_SIZES = (10, 1000, 10000, 100000)
+
+def _populate(manager, count: int) -> List[str]:
+    """Replace the manager's catalog with count synthetic versions in one transaction"""
+    versions = synthetic_versions(count)
+    with manager.store.transaction() as versions_data:
+        versions_data.clear()
+        for name, record in versions.items():
+            versions_data[name] = record
+    manager._invalidate_catalog()
+    return list(versions)
+
+def bench_version_manager(sizes=DEFAULT_SIZES, iterations: int = 2000) -> List[Dict]:
+    """Lookups, listing pages, reloads, stats and writes for each catalog size"""
+    from data.version_manager import VersionManager
+    
+    results = []
+    rng = random.Random(42)
+    for size in sizes:
+        manager = VersionManager(channel=f'bench-{size}')
+        names = _populate(manager, size)
+        middle = size // 2
+        # Whole-catalog operations scale with the catalog; keep their total time bounded
+        heavy = max(3, min(iterations, iterations * 100 // size))
+        tag = f'[{size}]'
+        
+        results += [
+            measure(f'catalog.reload{tag}', lambda: manager._load_catalog(manager.store.stamp()), heavy, warmup=1),
+            measure(f'find_update.by_name{tag}', lambda: manager.find_update(rng.choice(names)), iterations),
+            measure(f'find_update.by_code{tag}', lambda: manager.find_update(current_code=rng.randint(1, size)), iterations),
+            measure(f'find_update.unknown{tag}', lambda: manager.find_update('0.0.0-unknown'), iterations),
+            measure(f'get_version{tag}', lambda: manager.get_version(rng.choice(names)), iterations),
+            measure(f'get_latest_version{tag}', manager.get_latest_version, iterations),
+            measure(f'get_versions_page.100{tag}', lambda: manager.get_versions_page(middle, 100), iterations),
+            measure(f'get_all_versions{tag}', manager.get_all_versions, heavy),
+            measure(f'increment_stat{tag}', lambda: manager.increment_stat('bench_events'), iterations)
+        ]
+        
+        counter = iter(range(size + 1, size + 2 + heavy))
+        with redirect_stdout(io.StringIO()):
+            results.append(measure(f'add_version{tag}', lambda: manager.add_version({
+                'versionName': f"bench-{next(counter)}",
+                'releaseNotes': 'Benchmark release',
+                'isForceUpdate': False
+            }), heavy, warmup=1))
+    return results
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Cold-start benchmark: time until a freshly spawned worker answers its first /update
+Each run starts a new interpreter serving create_app() on a free local port, like an autoscaled worker
+Run through `python -m benchmarks run --suite startup`; needs SNAPUPDATE_DATA_DIR pointing at a scratch directory
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+import http.client
+from typing import Dict, List
+
+from .harness import BACKEND_DIR, summarize
+from .load import prepare_catalog
+
+# Prints the port as soon as the socket listens, then serves
+WORKER = """
+from werkzeug.serving import make_server
+from app import create_app
+server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+print(server.server_port, flush=True)
+server.serve_forever()
+"""
+FIRST_RESPONSE_TIMEOUT = 30.0
+
+def _get(port: int, path: str):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=FIRST_RESPONSE_TIMEOUT)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+def cold_start(version: str) -> Dict:
+    """Spawn one worker; seconds until it listens and until its first /update answer, plus its own phase timings"""
+    started = time.perf_counter()
+    worker = subprocess.Popen([sys.executable, '-c', WORKER], cwd=BACKEND_DIR, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, text=True, env=dict(os.environ, PYTHONUNBUFFERED='1'))
+    try:
+        # Startup logs share stdout; the port is the first line that is a number
+        for line in worker.stdout:
+            if line.strip().isdigit():
+                port = int(line)
+                break
+        else:
+            raise RuntimeError('Worker exited before listening')
+        listening = time.perf_counter() - started
+        
+        status, _ = _get(port, f'/api/v1/update?version={version}')
+        first_response = time.perf_counter() - started
+        if status != 200:
+            raise RuntimeError(f"Unexpected status {status}")
+        _, body = _get(port, '/api/v1/health')
+        return {'listening': listening, 'first_response': first_response, 'phases': json.loads(body)['startup']['phases_ms']}
+    finally:
+        worker.terminate()
+        worker.wait()
+
+def bench_startup(runs: int = 5, catalog_size: int = 1000) -> List[Dict]:
+    """Time-to-first-response of fresh workers against one seeded scratch catalog"""
+    names = prepare_catalog(catalog_size)
+    samples = [cold_start(names[0]) for _ in range(runs)]
+    
+    # Phase medians as reported by the workers themselves (ms)
+    phases = {}
+    for sample in samples:
+        for name, ms in sample['phases'].items():
+            phases.setdefault(name, []).append(ms)
+    phases = {name: sorted(values)[len(values) // 2] for name, values in phases.items()}
+    
+    elapsed = sum(sample['first_response'] for sample in samples)
+    return [
+        summarize(f'startup.first_response[{catalog_size} versions]', [s['first_response'] for s in samples], elapsed,
+                  phases_ms=phases),
+        summarize(f'startup.listening[{catalog_size} versions]', [s['listening'] for s in samples], elapsed)
+    ]
\ No newline at end of file
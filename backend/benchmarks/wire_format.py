@@ -0,0 +1,74 @@
+"""
+Response size and encoding cost per wire format
+Update-check answers as JSON / CBOR / MessagePack and /versions listings as identity / gzip / brotli
+
+    python -m benchmarks.wire_format --versions 1000 --iterations 2000
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.encoding import CBOR_TYPE, JSON_TYPE, MSGPACK_TYPE, CompressedBodyCache, brotli, compress, msgpack
+from app.responses import UpdateResponseCache
+from data.version_manager import CatalogSnapshot
+from .harness import synthetic_versions, time_per_call
+
+def bench_update(catalog: CatalogSnapshot, iterations: int) -> Dict:
+    """Answer size, first render and cached lookup per media type"""
+    media_types = [JSON_TYPE, CBOR_TYPE] + ([MSGPACK_TYPE] if msgpack is not None else [])
+    patches = {}
+    results = {}
+    for media_type in media_types:
+        responses = UpdateResponseCache(None)
+        body, _ = responses.answer(catalog, patches, '0.1', media_type=media_type)
+        results[media_type] = {
+            'bytes': len(body),
+            'render_us': round(time_per_call(
+                lambda: UpdateResponseCache(None).answer(catalog, patches, '0.1', media_type=media_type), iterations), 2),
+            'cached_us': round(time_per_call(lambda: responses.answer(catalog, patches, '0.1', media_type=media_type), iterations), 2)
+        }
+    return results
+
+def bench_listing(catalog: CatalogSnapshot, iterations: int) -> Dict:
+    """/versions body size, compression cost and cached lookup per content coding"""
+    body = json.dumps({'versions': catalog.ordered, 'total': len(catalog.ordered), 'nextCursor': None}).encode('utf-8')
+    results = {'identity': {'bytes': len(body), 'compress_us': 0.0, 'cached_us': 0.0}}
+    for encoding in ['gzip'] + (['br'] if brotli is not None else []):
+        cache = CompressedBodyCache()
+        compressed = cache.get('versions', catalog, '/api/v1/versions', body, encoding)
+        results[encoding] = {
+            'bytes': len(compressed),
+            'compress_us': round(time_per_call(lambda: compress(body, encoding), max(1, iterations // 20)), 2),
+            'cached_us': round(time_per_call(
+                lambda: cache.get('versions', catalog, '/api/v1/versions', body, encoding), iterations), 2)
+        }
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare wire formats and content codings")
+    parser.add_argument('--versions', type=int, default=1000, help="Versions in the synthetic catalog")
+    parser.add_argument('--iterations', type=int, default=2000, help="Calls per timing")
+    parser.add_argument('--json', help="Also write the results to this file")
+    args = parser.parse_args(argv)
+    
+    catalog = CatalogSnapshot(synthetic_versions(args.versions), stamp=1, revision=1)
+    results = {'update': bench_update(catalog, args.iterations), 'versions': bench_listing(catalog, args.iterations)}
+    
+    print(f"📊 Update check answer ({args.versions} versions in catalog)")
+    for media_type, result in results['update'].items():
+        print(f"   {media_type:<22} {result['bytes']:>8} B   render {result['render_us']:>9} µs   cached {result['cached_us']:>7} µs")
+    print("📊 /versions listing")
+    for encoding, result in results['versions'].items():
+        print(f"   {encoding:<22} {result['bytes']:>8} B   compress {result['compress_us']:>9} µs   cached {result['cached_us']:>7} µs")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
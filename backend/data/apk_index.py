@@ -0,0 +1,188 @@
+"""
+APK directory index for SnapUpdate Backend
+Caches the data/apks listing and refreshes it only when the directory changes; APK metadata
+(manifest, ABIs, signer, hash) is extracted in a background process pool and persisted per file
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+from .apk_manifest import HASH_CHUNK_SIZE, read_apk_metadata
+from .fileutils import atomic_write_json
+from .jobs import BackgroundJobs
+
+APK_PREFIX = 'SnapUpdate-v'
+APK_SUFFIX = '.apk'
+INDEX_WORKERS = int(os.getenv('APK_INDEX_WORKERS', '2'))
+INDEX_VERSION = 1
+# How often the advertised files are stat-ed for in-place overwrites the directory mtime does not show
+RECHECK_INTERVAL = float(os.getenv('APK_INDEX_RECHECK_SECONDS', '1.0'))
+
+class ApkIndex:
+    """Sorted list of APK versions on disk, keyed on the directory's mtime, plus their indexed metadata"""
+    
+    def __init__(self, apk_dir: str, prefix: str = APK_PREFIX, max_workers: int = INDEX_WORKERS):
+        self.apk_dir = apk_dir
+        self.prefix = prefix
+        self.index_file = os.path.join(apk_dir, '.index', 'manifests.json')
+        self._stamp = None
+        self._recheck_at = 0.0
+        self._versions = []
+        self._files = {}
+        self._manifests = {}
+        self._persisted = None
+        self._failed = {}
+        self._jobs = BackgroundJobs(max_workers)
+        self._lock = threading.Lock()
+    
+    def _dir_stamp(self):
+        """Directory mtime changes whenever a file is added, removed or renamed"""
+        try:
+            st = os.stat(self.apk_dir)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_ino)
+    
+    def versions(self) -> List[str]:
+        """Get the sorted APK versions, re-listing the directory only after it changed"""
+        stamp = self._dir_stamp()
+        if stamp == self._stamp:
+            return self._versions
+        
+        with self._lock:
+            if stamp != self._stamp:
+                self._versions = self._scan() if stamp is not None else []
+                self._stamp = stamp
+                self._refresh_manifests()
+            return self._versions
+    
+    def manifests(self) -> Dict[str, Dict]:
+        """Indexed metadata per APK version, from memory; a new dict object whenever an entry changes.
+        Files not indexed yet (or changed since) are missing until the background pool has read them."""
+        self.versions()
+        if time.monotonic() >= self._recheck_at:
+            with self._lock:
+                if time.monotonic() >= self._recheck_at:
+                    self._refresh_manifests()
+        return self._manifests
+    
+    def manifest(self, version: str) -> Optional[Dict]:
+        """Indexed metadata of one version's APK, or None"""
+        return self.manifests().get(version)
+    
+    def _path(self, version: str) -> str:
+        return os.path.join(self.apk_dir, f"{self.prefix}{version}{APK_SUFFIX}")
+    
+    def _refresh_manifests(self):
+        """Keep the persisted entries whose file still has the same mtime and size; queue the rest (holds the lock).
+        The dict object is only replaced when an entry changed, so response caches keyed on it stay warm."""
+        self._recheck_at = time.monotonic() + RECHECK_INTERVAL
+        if self._persisted is None:
+            self._persisted = self._load_index()
+        manifests = {}
+        for version in self._versions:
+            meta = self._persisted.get(f"{self.prefix}{version}{APK_SUFFIX}")
+            try:
+                st = os.stat(self._path(version))
+            except FileNotFoundError:
+                continue
+            if meta is not None and meta['mtimeNs'] == st.st_mtime_ns and meta['size'] == st.st_size:
+                manifests[version] = meta
+            elif self._failed.get(version) != (st.st_mtime_ns, st.st_size):
+                self._submit(version)
+        if manifests != self._manifests:
+            self._manifests = manifests
+    
+    def _submit(self, version: str):
+        """Queue one APK for metadata extraction in the process pool, once at a time"""
+        self._jobs.submit(version, self._job_done, read_apk_metadata, self._path(version))
+    
+    def _job_done(self, version: str, future):
+        """Publish an extracted entry (copy-on-write) and persist the index; failures are retried on the next change"""
+        error = future.exception()
+        with self._lock:
+            if error is not None:
+                print(f"Error indexing APK {version}: {error}")
+                try:
+                    st = os.stat(self._path(version))
+                    self._failed[version] = (st.st_mtime_ns, st.st_size)
+                except FileNotFoundError:
+                    pass
+                return
+            meta = future.result()
+            self._failed.pop(version, None)
+            self._persisted[meta['filename']] = meta
+            if version in self._versions:
+                self._manifests = {**self._manifests, version: meta}
+            current = {m['filename']: m for m in self._manifests.values()}
+        try:
+            atomic_write_json(self.index_file, {'version': INDEX_VERSION, 'files': current}, indent=None)
+        except OSError as e:
+            print(f"Error writing APK index: {e}")
+    
+    def _load_index(self) -> Dict[str, Dict]:
+        """Entries persisted by an earlier run, keyed by filename"""
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return index.get('files', {}) if index.get('version') == INDEX_VERSION else {}
+    
+    def wait(self):
+        """Block until all queued APKs have been indexed"""
+        self._jobs.wait()
+    
+    def _scan(self) -> List[str]:
+        """List the directory once"""
+        apk_files = []
+        for file in os.listdir(self.apk_dir):
+            if file.startswith(self.prefix) and file.endswith(APK_SUFFIX):
+                # Extract version from filename (e.g., "SnapUpdate-v1.0.apk" -> "1.0")
+                apk_files.append(file[len(self.prefix):-len(APK_SUFFIX)])
+        return sorted(apk_files)
+    
+    def file_info(self, version: str) -> Optional[Dict]:
+        """Get path, size, mtime and SHA-256 of a version's APK; the digest is computed once per file change"""
+        path = self._path(version)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        
+        cached = self._files.get(path)
+        if cached is not None and cached['stamp'] == stamp:
+            return cached
+        
+        # The indexer already hashed this exact file; a file replaced in place is queued again
+        meta = self._manifests.get(version)
+        if meta is not None and (meta['mtimeNs'], meta['size']) != (st.st_mtime_ns, st.st_size):
+            meta = None
+            with self._lock:
+                self._manifests = {name: m for name, m in self._manifests.items() if name != version}
+                self._submit(version)
+        info = {
+            'stamp': stamp,
+            'path': path,
+            'filename': os.path.basename(path),
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+            'sha256': meta['sha256'] if meta is not None else self._sha256(path)
+        }
+        with self._lock:
+            self._files[path] = info
+        return info
+    
+    @staticmethod
+    def _sha256(path: str) -> str:
+        """Hash a file in one streaming pass without loading it into memory"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
\ No newline at end of file
@@ -0,0 +1,282 @@
+"""
+APK metadata extraction for SnapUpdate Backend
+Reads the zip central directory, the binary AndroidManifest.xml and the signing certificate
+without unpacking the archive (run in the APK indexer's process pool)
+"""
+
+import os
+import struct
+import hashlib
+import zipfile
+from typing import Dict, List, Optional
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Binary XML chunk types
+RES_STRING_POOL_TYPE = 0x0001
+RES_XML_TYPE = 0x0003
+RES_XML_START_ELEMENT_TYPE = 0x0102
+RES_XML_RESOURCE_MAP_TYPE = 0x0180
+UTF8_FLAG = 1 << 8
+
+# Typed attribute values
+TYPE_STRING = 0x03
+TYPE_INT_DEC = 0x10
+TYPE_INT_HEX = 0x11
+
+# android: attribute resource ids (names may be stripped from the string pool)
+ATTR_IDS = {
+    0x0101021b: 'versionCode',
+    0x0101021c: 'versionName',
+    0x0101020c: 'minSdkVersion',
+    0x01010270: 'targetSdkVersion'
+}
+
+APK_SIG_BLOCK_MAGIC = b'APK Sig Block 42'
+SIGNATURE_SCHEMES = ((0x1b93ad61, 'v3.1'), (0xf05368c0, 'v3'), (0x7109871a, 'v2'))
+V1_SIGNATURE_SUFFIXES = ('.RSA', '.DSA', '.EC')
+
+def read_apk_metadata(path: str) -> Dict:
+    """Size, SHA-256, manifest facts, native ABIs and signer certificate digests of one APK"""
+    st = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    
+    meta = {
+        'filename': os.path.basename(path),
+        'size': st.st_size,
+        'mtimeNs': st.st_mtime_ns,
+        'sha256': digest.hexdigest(),
+        'packageName': None,
+        'versionCode': None,
+        'versionName': None,
+        'minSdk': None,
+        'targetSdk': None,
+        'abis': [],
+        'signatureScheme': None,
+        'signerSha256': []
+    }
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        meta['abis'] = native_abis(names)
+        if 'AndroidManifest.xml' in names:
+            meta.update(parse_manifest(archive.read('AndroidManifest.xml')))
+        scheme, certificates = signing_certificates(path, archive, names)
+    meta['signatureScheme'] = scheme
+    meta['signerSha256'] = [hashlib.sha256(cert).hexdigest() for cert in certificates]
+    return meta
+
+def native_abis(names: List[str]) -> List[str]:
+    """ABIs with native libraries (lib/<abi>/*.so); empty for pure-Java APKs that run anywhere"""
+    abis = set()
+    for name in names:
+        parts = name.split('/')
+        if len(parts) == 3 and parts[0] == 'lib' and parts[2].endswith('.so'):
+            abis.add(parts[1])
+    return sorted(abis)
+
+def parse_manifest(data: bytes) -> Dict:
+    """packageName, versionCode, versionName, minSdk and targetSdk from binary AndroidManifest.xml"""
+    chunk_type, header_size, _ = struct.unpack_from('<HHI', data, 0)
+    if chunk_type != RES_XML_TYPE:
+        raise ValueError('Not a binary XML manifest')
+    
+    strings = []
+    resource_ids = []
+    found = {}
+    offset = header_size
+    while offset + 8 <= len(data):
+        chunk_type, header_size, size = struct.unpack_from('<HHI', data, offset)
+        if size < 8:
+            break
+        if chunk_type == RES_STRING_POOL_TYPE:
+            strings = _string_pool(data, offset, header_size)
+        elif chunk_type == RES_XML_RESOURCE_MAP_TYPE:
+            resource_ids = list(struct.unpack_from(f'<{(size - header_size) // 4}I', data, offset + header_size))
+        elif chunk_type == RES_XML_START_ELEMENT_TYPE:
+            element = _start_element(data, offset, header_size, strings, resource_ids)
+            if element is not None:
+                name, attributes = element
+                if name == 'manifest':
+                    found['packageName'] = attributes.get('package')
+                    found['versionCode'] = attributes.get('versionCode')
+                    found['versionName'] = attributes.get('versionName')
+                elif name == 'uses-sdk':
+                    found['minSdk'] = attributes.get('minSdkVersion')
+                    found['targetSdk'] = attributes.get('targetSdkVersion')
+                    break
+        offset += size
+    return found
+
+def _string_pool(data: bytes, offset: int, header_size: int) -> List[str]:
+    count, _, flags, strings_start, _ = struct.unpack_from('<IIIII', data, offset + 8)
+    offsets = struct.unpack_from(f'<{count}I', data, offset + header_size)
+    base = offset + strings_start
+    utf8 = flags & UTF8_FLAG
+    strings = []
+    for string_offset in offsets:
+        position = base + string_offset
+        if utf8:
+            # UTF-16 length then UTF-8 byte length, each 1 or 2 bytes
+            position += 2 if data[position] & 0x80 else 1
+            length = data[position]
+            if length & 0x80:
+                length = (length & 0x7f) << 8 | data[position + 1]
+                position += 1
+            position += 1
+            strings.append(data[position:position + length].decode('utf-8', 'replace'))
+        else:
+            length, = struct.unpack_from('<H', data, position)
+            position += 2
+            if length & 0x8000:
+                low, = struct.unpack_from('<H', data, position)
+                length = (length & 0x7fff) << 16 | low
+                position += 2
+            strings.append(data[position:position + length * 2].decode('utf-16-le', 'replace'))
+    return strings
+
+def _start_element(data: bytes, offset: int, header_size: int, strings: List[str], resource_ids: List[int]):
+    _, name_index, attribute_start, attribute_size, attribute_count = struct.unpack_from('<IIHHH', data, offset + header_size)
+    if name_index >= len(strings):
+        return None
+    attributes = {}
+    position = offset + header_size + attribute_start
+    for _ in range(attribute_count):
+        _, attr_name, raw_value, _, _, value_type, value = struct.unpack_from('<IIIHBBI', data, position)
+        position += attribute_size
+        resource_id = resource_ids[attr_name] if attr_name < len(resource_ids) else None
+        name = ATTR_IDS.get(resource_id) or (strings[attr_name] if attr_name < len(strings) else None)
+        if name is None:
+            continue
+        if value_type == TYPE_STRING:
+            attributes[name] = strings[value] if value < len(strings) else None
+        elif value_type in (TYPE_INT_DEC, TYPE_INT_HEX):
+            attributes[name] = value
+        elif raw_value != 0xffffffff and raw_value < len(strings):
+            attributes[name] = strings[raw_value]
+    return strings[name_index], attributes
+
+def signing_certificates(path: str, archive: zipfile.ZipFile, names: List[str]):
+    """(scheme, [DER certificate]) from the APK Signing Block (v3.1/v3/v2), else from the v1 JAR signature"""
+    with open(path, 'rb') as f:
+        block = _signing_block(f)
+    if block is not None:
+        for block_id, scheme in SIGNATURE_SCHEMES:
+            if block_id in block:
+                certificates = _scheme_certificates(block[block_id])
+                if certificates:
+                    return scheme, certificates
+    
+    for name in names:
+        if name.startswith('META-INF/') and name.upper().endswith(V1_SIGNATURE_SUFFIXES):
+            certificate = _pkcs7_certificate(archive.read(name))
+            if certificate is not None:
+                return 'v1', [certificate]
+    return None, []
+
+def _signing_block(f) -> Optional[Dict[int, bytes]]:
+    """ID-value pairs of the APK Signing Block that sits right before the central directory"""
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    tail_size = min(file_size, 65535 + 22)
+    f.seek(file_size - tail_size)
+    tail = f.read()
+    eocd = tail.rfind(b'PK\x05\x06')
+    if eocd < 0 or eocd + 20 > len(tail):
+        return None
+    central_directory, = struct.unpack_from('<I', tail, eocd + 16)
+    if central_directory < 32:
+        return None
+    
+    f.seek(central_directory - 24)
+    footer = f.read(24)
+    if footer[8:] != APK_SIG_BLOCK_MAGIC:
+        return None
+    block_size, = struct.unpack_from('<Q', footer, 0)
+    if block_size + 8 > central_directory or block_size < 24:
+        return None
+    f.seek(central_directory - block_size - 8)
+    block = f.read(block_size - 16)
+    
+    pairs = {}
+    position = 8
+    while position + 12 <= len(block):
+        length, block_id = struct.unpack_from('<QI', block, position)
+        if length < 4 or position + 8 + length > len(block):
+            break
+        pairs[block_id] = block[position + 12:position + 8 + length]
+        position += 8 + length
+    return pairs
+
+def _length_prefixed(data: bytes, position: int):
+    length, = struct.unpack_from('<I', data, position)
+    end = position + 4 + length
+    if end > len(data):
+        raise ValueError('Truncated signing block')
+    return data[position + 4:end], end
+
+def _sequence(data: bytes) -> List[bytes]:
+    items = []
+    position = 0
+    while position < len(data):
+        item, position = _length_prefixed(data, position)
+        items.append(item)
+    return items
+
+def _scheme_certificates(value: bytes) -> List[bytes]:
+    """First certificate of every signer in a v2/v3 signature scheme block"""
+    certificates = []
+    try:
+        signers, _ = _length_prefixed(value, 0)
+        for signer in _sequence(signers):
+            signed_data, _ = _length_prefixed(signer, 0)
+            _, position = _length_prefixed(signed_data, 0)  # digests
+            signer_certificates, _ = _length_prefixed(signed_data, position)
+            chain = _sequence(signer_certificates)
+            if chain:
+                certificates.append(chain[0])
+    except (ValueError, struct.error):
+        return []
+    return certificates
+
+def _der(data: bytes, position: int):
+    """(tag, content start, end) of the DER element at position"""
+    tag = data[position]
+    length = data[position + 1]
+    position += 2
+    if length & 0x80:
+        count = length & 0x7f
+        length = int.from_bytes(data[position:position + count], 'big')
+        position += count
+    return tag, position, position + length
+
+def _pkcs7_certificate(data: bytes) -> Optional[bytes]:
+    """DER of the first certificate in a PKCS#7 SignedData (META-INF/*.RSA)"""
+    try:
+        _, position, _ = _der(data, 0)  # ContentInfo
+        _, _, oid_end = _der(data, position)
+        _, position, _ = _der(data, oid_end)  # [0] EXPLICIT
+        _, position, end = _der(data, position)  # SignedData
+        while position < end:
+            tag, content, element_end = _der(data, position)
+            if tag == 0xa0:
+                # [0] IMPLICIT certificates: the first element is the signer's certificate
+                _, _, certificate_end = _der(data, content)
+                return data[content:certificate_end]
+            position = element_end
+    except IndexError:
+        return None
+    return None
+
+def is_compatible(meta: Optional[Dict], sdk: Optional[int] = None, abis: Optional[List[str]] = None) -> bool:
+    """Whether a device (API level, supported ABIs) can install an APK; unknown APKs count as compatible"""
+    if not meta:
+        return True
+    min_sdk = meta.get('minSdk')
+    if sdk is not None and isinstance(min_sdk, int) and sdk < min_sdk:
+        return False
+    if abis and meta.get('abis') and not set(abis) & set(meta['abis']):
+        return False
+    return True
\ No newline at end of file
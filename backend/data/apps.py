@@ -0,0 +1,47 @@
+"""
+App and channel configuration for SnapUpdate Backend
+Each app has its own APK naming, download URL template and release channels
+"""
+
+import os
+import json
+from typing import Dict
+
+from .apk_index import APK_PREFIX
+from .storage import DATA_DIR, DEFAULT_APP_ID, DEFAULT_CHANNEL
+
+APPS_FILE = os.path.join(DATA_DIR, 'apps.json')
+
+# The original single-app setup; apps.json may override it or add more apps
+DEFAULT_APPS = {
+    DEFAULT_APP_ID: {
+        "name": "SnapUpdate",
+        "apkPrefix": APK_PREFIX,
+        "downloadUrlTemplate": "https://github.com/kariemSeiam/snapupdate/raw/refs/heads/master/backend/data/apks/SnapUpdate-v{version}.apk",
+        "channels": [DEFAULT_CHANNEL, "beta"]
+    }
+}
+
+def load_apps(apps_file: str = APPS_FILE) -> Dict[str, Dict]:
+    """Read app configs (appId -> name, apkPrefix, downloadUrlTemplate, channels) merged over the defaults"""
+    apps = {app_id: dict(config) for app_id, config in DEFAULT_APPS.items()}
+    if not os.path.exists(apps_file):
+        return apps
+    
+    with open(apps_file, 'r') as f:
+        for app_id, config in json.load(f).items():
+            merged = {
+                'name': app_id,
+                'apkPrefix': f"{app_id}-v",
+                'channels': [DEFAULT_CHANNEL],
+                **apps.get(app_id, {}),
+                **config
+            }
+            if not merged.get('downloadUrlTemplate'):
+                raise ValueError(f"App {app_id} has no downloadUrlTemplate")
+            apps[app_id] = merged
+    return apps
+
+def build_download_url(app_config: Dict, app_id: str, channel: str, version_name: str) -> str:
+    """Fill an app's download URL template ({appId}, {channel}, {version} placeholders)"""
+    return app_config['downloadUrlTemplate'].format(appId=app_id, channel=channel, version=version_name)
\ No newline at end of file
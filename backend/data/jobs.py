@@ -0,0 +1,59 @@
+"""
+Background jobs for SnapUpdate Backend
+Process pool shared by the APK indexer and the patch builder: at most one job per key, with workers
+spawned rather than forked from a request thread, and recreated in forked server workers
+"""
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Hashable
+
+# Forking a multi-threaded server can copy a held lock into the child; spawn keeps no state a forked
+# server worker would inherit (a forkserver belongs to the process that started it)
+POOL_CONTEXT = multiprocessing.get_context('spawn')
+
+class BackgroundJobs:
+    """Lazily started process pool running one job per key at a time"""
+    
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pid = None
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+    
+    def _check_pid(self):
+        """Drop a pool and pending jobs inherited from the parent process (its workers and callbacks stay there)"""
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._executor = None
+            self._pending = set()
+            self._pid = os.getpid()
+    
+    def submit(self, key: Hashable, done: Callable[[Hashable, Future], None], fn: Callable, *args) -> bool:
+        """Run fn(*args) in the pool unless a job for key is already queued; done(key, future) runs when it ends"""
+        self._check_pid()
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=POOL_CONTEXT)
+            future = self._executor.submit(fn, *args)
+        future.add_done_callback(lambda f: self._finish(key, f, done))
+        return True
+    
+    def _finish(self, key: Hashable, future: Future, done: Callable[[Hashable, Future], None]):
+        with self._lock:
+            self._pending.discard(key)
+        done(key, future)
+    
+    def wait(self):
+        """Block until every queued job has finished"""
+        self._check_pid()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Metrics for SnapUpdate Backend
+Per-thread counters and histograms (no locks on the recording path), summed and rendered in the
+Prometheus text format on scrape. Values are per worker process, like the stats shards.
+"""
+
+import os
+import time
+from bisect import bisect_left as _bucket
+import weakref
+import threading
+from typing import Callable, Dict, List, Tuple
+
+# Upper bounds (seconds) shared by every latency histogram
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _Shard:
+    """One thread's counters and histograms; only that thread writes to it"""
+    
+    __slots__ = ('counters', 'histograms', 'requests', '__weakref__')
+    
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        # Latency histograms of HTTP requests keyed (endpoint, method, status), labelled on scrape
+        self.requests = {}
+
+class MetricsRegistry:
+    """Counters and latency histograms aggregated per thread; a scrape sums the live shards and retired ones"""
+    
+    def __init__(self):
+        self.started = time.time()
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard()
+        self._lock = threading.Lock()
+        self._help = {}
+        self._gauges = {}
+    
+    def _reset(self):
+        """Start from zero in a forked worker instead of repeating the parent's counts"""
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard()
+        self._lock = threading.Lock()
+    
+    def describe(self, name: str, kind: str, text: str):
+        """Register the HELP/TYPE lines of a metric"""
+        self._help[name] = (kind, text)
+    
+    def gauge(self, name: str, text: str, read: Callable[[], Dict[Tuple, float]]):
+        """Register a gauge computed at scrape time: read() returns {labels: value}"""
+        self.describe(name, 'gauge', text)
+        self._gauges[name] = read
+    
+    def _shard(self) -> _Shard:
+        """Create and register the calling thread's shard"""
+        shard = self._local.shard = _Shard()
+        with self._lock:
+            # Threads come and go (werkzeug spawns one per request): fold finished ones away
+            self._shards = [entry for entry in self._shards if self._alive(entry)]
+            self._shards.append((weakref.ref(threading.current_thread()), shard))
+        return shard
+    
+    def _alive(self, entry) -> bool:
+        """Keep a live thread's shard; merge a finished thread's shard into the retired totals"""
+        thread, shard = entry
+        thread = thread()
+        if thread is not None and thread.is_alive():
+            return True
+        _merge(self._retired, shard)
+        return False
+    
+    def inc(self, name: str, labels: Tuple = (), amount: float = 1):
+        """Add to a counter"""
+        try:
+            counters = self._local.shard.counters
+        except AttributeError:
+            counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+    
+    def observe(self, name: str, labels: Tuple, seconds: float):
+        """Record one latency sample"""
+        try:
+            histograms = self._local.shard.histograms
+        except AttributeError:
+            histograms = self._shard().histograms
+        key = (name, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        histogram[_bucket(LATENCY_BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+    
+    def observe_request(self, endpoint: str, method: str, status: int, seconds: float):
+        """Count one HTTP request and record its latency (the per-request hot path: one lookup, no labels built)"""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shard()
+        key = (endpoint, method, status)
+        histogram = shard.requests.get(key)
+        if histogram is None:
+            histogram = shard.requests[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        histogram[_bucket(LATENCY_BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+    
+    def collect(self) -> _Shard:
+        """Sum of every shard; reads other threads' dicts without stopping them (values may lag by one sample)"""
+        total = _Shard()
+        with self._lock:
+            _merge(total, self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            _merge(total, shard)
+        return total
+    
+    def render(self) -> str:
+        """Prometheus text exposition format (0.0.4)"""
+        total = self.collect()
+        families = {}
+        for (name, labels), value in total.counters.items():
+            families.setdefault(name, []).append(f"{name}{_labels(labels)} {_number(value)}")
+        for (name, labels), histogram in total.histograms.items():
+            lines = families.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), histogram):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(histogram[-1])}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        for name, read in self._gauges.items():
+            try:
+                values = read()
+            except Exception as e:
+                print(f"Error reading gauge {name}: {e}")
+                continue
+            families[name] = [f"{name}{_labels(labels)} {_number(value)}" for labels, value in values.items()]
+        
+        out = []
+        for name in sorted(families):
+            kind, text = self._help.get(name, ('untyped', ''))
+            out.append(f"# HELP {name} {text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(families[name])
+        return '\n'.join(out) + '\n'
+
+def record_exception(endpoint: str, error: BaseException):
+    """Count an exception that a view turned into an error response (or that Flask turned into a 500)"""
+    metrics.inc('snapupdate_exceptions_total', (('endpoint', endpoint or 'unmatched'), ('exception', type(error).__name__)))
+
+def _merge(into: _Shard, shard: _Shard):
+    for (endpoint, method, status), histogram in list(shard.requests.items()):
+        key = ('snapupdate_http_requests_total', (('endpoint', endpoint), ('method', method), ('status', status)))
+        into.counters[key] = into.counters.get(key, 0) + sum(histogram[:-1])
+        _merge_histogram(into, ('snapupdate_http_request_duration_seconds', (('endpoint', endpoint),)), histogram)
+    for key, value in list(shard.counters.items()):
+        into.counters[key] = into.counters.get(key, 0) + value
+    for key, histogram in list(shard.histograms.items()):
+        _merge_histogram(into, key, histogram)
+
+def _merge_histogram(into: _Shard, key: Tuple, histogram: List):
+    merged = into.histograms.get(key)
+    into.histograms[key] = list(histogram) if merged is None else [a + b for a, b in zip(merged, histogram)]
+
+def _labels(labels: Tuple) -> str:
+    if not labels:
+        return ''
+    parts = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# Process-wide registry shared by the data layer and the Flask app
+metrics = MetricsRegistry()
+os.register_at_fork(after_in_child=metrics._reset)
+metrics.describe('snapupdate_http_requests_total', 'counter', 'HTTP requests by endpoint, method and status')
+metrics.describe('snapupdate_http_request_duration_seconds', 'histogram', 'Time until the response headers are ready')
+metrics.describe('snapupdate_exceptions_total', 'counter', 'Exceptions raised while handling requests')
+metrics.describe('snapupdate_catalog_reloads_total', 'counter', 'Catalog snapshots rebuilt from the version store')
+metrics.describe('snapupdate_catalog_reload_duration_seconds', 'histogram', 'Time to load and index a catalog')
+metrics.describe('snapupdate_cache_requests_total', 'counter', 'Cache lookups by cache and result (hit or miss)')
+metrics.describe('snapupdate_stats_flushes_total', 'counter', 'Stats shard writes')
+metrics.describe('snapupdate_stats_flush_duration_seconds', 'histogram', 'Time to write a stats shard')
+metrics.gauge('snapupdate_process_start_time_seconds', 'Start time of the process since the epoch',
+              lambda: {(): metrics.started})
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Catalog change notifications for SnapUpdate Backend
+One notifier per process wakes every waiting update stream when a catalog changes
+"""
+
+import os
+import time
+import threading
+from typing import Callable, Hashable, Optional
+
+WATCH_INTERVAL = float(os.getenv('CATALOG_WATCH_INTERVAL', '1.0'))
+
+class ChangeNotifier:
+    """Per-catalog change counters behind one Condition; a single watcher thread picks up other workers' writes"""
+    
+    def __init__(self, watch_interval: float = WATCH_INTERVAL):
+        self.watch_interval = watch_interval
+        self._cond = threading.Condition()
+        self._generations = {}
+        self._managers = {}
+        self._stamps = {}
+        self._listeners = []
+        self._pid = None
+    
+    def watch(self, key: Hashable, manager):
+        """Track a catalog so writes from other processes are noticed too"""
+        with self._cond:
+            self._managers[key] = manager
+            self._stamps[key] = manager.store.stamp()
+    
+    def add_listener(self, callback: Callable[[Hashable], None]):
+        """Call back (from the notifying thread) whenever a catalog changes, e.g. to wake an event loop"""
+        with self._cond:
+            self._listeners.append(callback)
+        self._ensure_watcher()
+    
+    def generation(self, key: Hashable) -> int:
+        """Current change counter of a catalog"""
+        return self._generations.get(key, 0)
+    
+    def notify(self, key: Hashable):
+        """Record a change and wake everything waiting on that catalog"""
+        with self._cond:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            manager = self._managers.get(key)
+            if manager is not None:
+                self._stamps[key] = manager.store.stamp()
+            self._cond.notify_all()
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(key)
+            except Exception as e:
+                print(f"Error notifying catalog change: {e}")
+    
+    def wait(self, key: Hashable, generation: int, timeout: Optional[float]) -> int:
+        """Block until the catalog moves past a generation or the timeout expires; returns the current generation"""
+        self._ensure_watcher()
+        with self._cond:
+            self._cond.wait_for(lambda: self._generations.get(key, 0) != generation, timeout)
+            return self._generations.get(key, 0)
+    
+    def _ensure_watcher(self):
+        """Start this process's watcher thread (also after a fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._watch_loop, name='catalog-watcher', daemon=True).start()
+    
+    def _watch_loop(self):
+        """Compare each catalog's store stamp on a timer; one cheap check per catalog, not per connection"""
+        while True:
+            time.sleep(self.watch_interval)
+            with self._cond:
+                watched = list(self._managers.items())
+            for key, manager in watched:
+                try:
+                    stamp = manager.store.stamp()
+                except Exception as e:
+                    print(f"Error checking catalog {key}: {e}")
+                    continue
+                if stamp != self._stamps.get(key):
+                    self.notify(key)
\ No newline at end of file
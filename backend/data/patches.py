@@ -0,0 +1,259 @@
+"""
+Delta update packages for SnapUpdate Backend
+Zip-entry-aware binary patches between APK versions, built in a background process pool
+"""
+
+import os
+import json
+import zlib
+import struct
+import hashlib
+import zipfile
+import threading
+from typing import Dict, List, Optional
+
+from .apk_index import APK_SUFFIX, ApkIndex
+from .apk_manifest import HASH_CHUNK_SIZE
+from .fileutils import atomic_write_json
+from .jobs import BackgroundJobs
+
+PATCH_MAGIC = b'SUPATCH1'
+PATCH_HISTORY = 3
+COPY_OP = b'C'
+INSERT_OP = b'I'
+
+def _entry_spans(path: str) -> List[tuple]:
+    """(offset, length) of every local file record (header + data + descriptor) in a zip"""
+    spans = []
+    with open(path, 'rb') as raw, zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            raw.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', raw.read(4))
+            length = 30 + name_length + extra_length + info.compress_size
+            if info.flag_bits & 0x08:
+                # Data descriptor, with or without its optional signature
+                raw.seek(info.header_offset + length)
+                length += 16 if raw.read(4) == b'PK\x07\x08' else 12
+            spans.append((info.header_offset, length))
+    return sorted(spans)
+
+def build_patch(old_path: str, new_path: str, patch_path: str) -> Dict:
+    """Write a patch that rebuilds new_path byte-for-byte from old_path; returns its metadata"""
+    with open(old_path, 'rb') as f:
+        old_data = f.read()
+    with open(new_path, 'rb') as f:
+        new_data = f.read()
+    
+    # Unchanged zip entries are copied from the old APK; everything else is inserted literally
+    old_records = {}
+    for offset, length in _entry_spans(old_path):
+        old_records.setdefault(hashlib.sha1(old_data[offset:offset + length]).digest(), (offset, length))
+    
+    ops = []
+    position = 0
+    for offset, length in _entry_spans(new_path) + [(len(new_data), 0)]:
+        if offset > position:
+            ops.append((INSERT_OP, position, offset - position))
+        if length:
+            match = old_records.get(hashlib.sha1(new_data[offset:offset + length]).digest())
+            if match and old_data[match[0]:match[0] + length] == new_data[offset:offset + length]:
+                previous = ops[-1] if ops else None
+                if previous and previous[0] == COPY_OP and previous[1] + previous[2] == match[0]:
+                    ops[-1] = (COPY_OP, previous[1], previous[2] + length)
+                else:
+                    ops.append((COPY_OP, match[0], length))
+            else:
+                ops.append((INSERT_OP, offset, length))
+        position = max(position, offset + length)
+    
+    compressor = zlib.compressobj(9)
+    tmp_path = patch_path + '.tmp'
+    os.makedirs(os.path.dirname(patch_path), exist_ok=True)
+    with open(tmp_path, 'wb') as out:
+        out.write(PATCH_MAGIC + struct.pack('<Q', len(new_data)) + hashlib.sha256(new_data).digest())
+        for op, start, length in ops:
+            if op == COPY_OP:
+                out.write(compressor.compress(COPY_OP + struct.pack('<QQ', start, length)))
+            else:
+                out.write(compressor.compress(INSERT_OP + struct.pack('<Q', length) + new_data[start:start + length]))
+        out.write(compressor.flush())
+    os.replace(tmp_path, patch_path)
+    
+    with open(patch_path, 'rb') as f:
+        patch_sha256 = hashlib.sha256(f.read()).hexdigest()
+    return {
+        'size': os.path.getsize(patch_path),
+        'sha256': patch_sha256,
+        'sourceSha256': hashlib.sha256(old_data).hexdigest(),
+        'targetSize': len(new_data),
+        'targetSha256': hashlib.sha256(new_data).hexdigest()
+    }
+
+def apply_patch(old_path: str, patch_path: str, out_path: str):
+    """Rebuild the new APK from the old one and a patch (reference implementation for clients)"""
+    with open(patch_path, 'rb') as f:
+        header = f.read(len(PATCH_MAGIC) + 8 + 32)
+        body = zlib.decompress(f.read())
+    if header[:len(PATCH_MAGIC)] != PATCH_MAGIC:
+        raise ValueError('Not a SnapUpdate patch')
+    target_size, = struct.unpack('<Q', header[len(PATCH_MAGIC):len(PATCH_MAGIC) + 8])
+    target_sha256 = header[len(PATCH_MAGIC) + 8:]
+    
+    with open(old_path, 'rb') as f:
+        old_data = f.read()
+    parts = []
+    position = 0
+    while position < len(body):
+        op = body[position:position + 1]
+        if op == COPY_OP:
+            start, length = struct.unpack('<QQ', body[position + 1:position + 17])
+            parts.append(old_data[start:start + length])
+            position += 17
+        elif op == INSERT_OP:
+            length, = struct.unpack('<Q', body[position + 1:position + 9])
+            parts.append(body[position + 9:position + 9 + length])
+            position += 9 + length
+        else:
+            raise ValueError('Corrupt patch')
+    
+    new_data = b''.join(parts)
+    if len(new_data) != target_size or hashlib.sha256(new_data).digest() != target_sha256:
+        raise ValueError('Patch does not match the old APK')
+    with open(out_path, 'wb') as f:
+        f.write(new_data)
+
+def _build_patch_job(old_path: str, new_path: str, patch_path: str, meta_path: str, from_version: str, to_version: str):
+    """Build one patch and its metadata file"""
+    meta = build_patch(old_path, new_path, patch_path)
+    meta.update({'from': from_version, 'to': to_version, 'filename': os.path.basename(patch_path)})
+    atomic_write_json(meta_path, meta)
+    return meta
+
+def _matches(meta: Dict, source_sha256: Optional[str], target_sha256: Optional[str]) -> bool:
+    """A patch is only valid for the exact APKs it was built from and to"""
+    return (source_sha256 is not None and meta.get('sourceSha256') == source_sha256
+            and meta.get('targetSha256') == target_sha256)
+
+def _file_sha256(path: str) -> Optional[str]:
+    """SHA-256 of a file in one streaming pass, or None if it does not exist"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+def _patch_path(apk_dir: str, prefix: str, from_version: str, to_version: str) -> str:
+    return os.path.join(apk_dir, 'patches', f"{prefix}{from_version}-to-v{to_version}.patch")
+
+def build_patches(apk_dir: str, prefix: str, to_version: str, from_versions: List[str]) -> List[Dict]:
+    """Build the missing patches from older versions to to_version, and those whose APKs were replaced since;
+    returns the metadata of the patches built. Hashes every APK involved (process pool entry point)."""
+    new_path = os.path.join(apk_dir, f"{prefix}{to_version}{APK_SUFFIX}")
+    target_sha256 = _file_sha256(new_path)
+    if target_sha256 is None:
+        return []
+    
+    built = []
+    for from_version in from_versions:
+        old_path = os.path.join(apk_dir, f"{prefix}{from_version}{APK_SUFFIX}")
+        source_sha256 = _file_sha256(old_path) if from_version != to_version else None
+        if source_sha256 is None:
+            continue
+        patch_path = _patch_path(apk_dir, prefix, from_version, to_version)
+        try:
+            with open(patch_path + '.json', 'r') as f:
+                if _matches(json.load(f), source_sha256, target_sha256):
+                    continue
+        except (FileNotFoundError, ValueError):
+            pass
+        built.append(_build_patch_job(old_path, new_path, patch_path, patch_path + '.json', from_version, to_version))
+    return built
+
+class PatchManager:
+    """Index of cached patches in data/apks/patches plus background generation"""
+    
+    def __init__(self, apk_index: ApkIndex, max_workers: int = 1):
+        self.apk_index = apk_index
+        self.apk_dir = apk_index.apk_dir
+        self.prefix = apk_index.prefix
+        self.patch_dir = os.path.join(self.apk_dir, 'patches')
+        self._stamp = None
+        self._built = {}
+        self._index = {}
+        self._index_of = (None, None)
+        self._jobs = BackgroundJobs(max_workers)
+        self._lock = threading.Lock()
+    
+    def patch_path(self, from_version: str, to_version: str) -> str:
+        """Path of the patch turning one version's APK into another's"""
+        return _patch_path(self.apk_dir, self.prefix, from_version, to_version)
+    
+    def _read_dir(self) -> Dict:
+        """Metadata of every patch on disk keyed by (from, to), re-read only when the patch directory changed"""
+        try:
+            st = os.stat(self.patch_dir)
+            stamp = (st.st_mtime_ns, st.st_ino)
+        except FileNotFoundError:
+            stamp = None
+        if stamp == self._stamp:
+            return self._built
+        
+        with self._lock:
+            if stamp != self._stamp:
+                built = {}
+                if stamp is not None:
+                    for name in os.listdir(self.patch_dir):
+                        if name.endswith('.patch.json'):
+                            try:
+                                with open(os.path.join(self.patch_dir, name), 'r') as f:
+                                    meta = json.load(f)
+                                built[(meta['from'], meta['to'])] = meta
+                            except (OSError, ValueError, KeyError):
+                                continue
+                self._built = built
+                self._stamp = stamp
+            return self._built
+    
+    def index(self) -> Dict:
+        """Patches keyed by (from, to) whose source and target match the indexed APKs on disk;
+        a new dict object whenever the patch directory or the APK index changed"""
+        built = self._read_dir()
+        manifests = self.apk_index.manifests()
+        indexed_built, indexed_manifests = self._index_of
+        if built is indexed_built and manifests is indexed_manifests:
+            return self._index
+        
+        with self._lock:
+            sha256 = lambda version: (manifests.get(version) or {}).get('sha256')
+            self._index = {key: meta for key, meta in built.items()
+                           if _matches(meta, sha256(key[0]), sha256(key[1]))}
+            self._index_of = (built, manifests)
+            return self._index
+    
+    def get(self, from_version: str, to_version: str) -> Optional[Dict]:
+        """Metadata of a cached patch, or None"""
+        return self.index().get((from_version, to_version))
+    
+    def schedule(self, to_version: str, from_versions: List[str]) -> bool:
+        """Queue the patch builds from older versions to to_version and return at once; finding the stale
+        patches (hashing the APKs) happens in the process pool too. False if builds to to_version are queued."""
+        return self._jobs.submit(to_version, self._job_done, build_patches,
+                                 self.apk_dir, self.prefix, to_version, list(from_versions))
+    
+    def build(self, to_version: str, from_versions: List[str]) -> List[Dict]:
+        """Build the missing or stale patches to to_version in this process (command line)"""
+        return build_patches(self.apk_dir, self.prefix, to_version, from_versions)
+    
+    def wait(self):
+        """Block until all queued patch builds have finished"""
+        self._jobs.wait()
+    
+    def _job_done(self, to_version: str, future):
+        """Log the outcome of a background build; a failed one is retried on the next schedule()"""
+        if future.exception() is not None:
+            print(f"Error building patches to {to_version}: {future.exception()}")
+        elif future.result():
+            print(f"✅ Built {len(future.result())} patch(es) to {to_version}")
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+Bulk release import for SnapUpdate Backend
+Validates many version records and plans their versionCodes before a single catalog transaction
+"""
+
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from .rollout import parse_cohorts, parse_percentage
+
+def release_record(raw) -> Dict:
+    """Validate one release into the stored version fields ("version" is accepted for "versionName")"""
+    if not isinstance(raw, dict):
+        raise ValueError('Each release must be an object')
+    version_name = raw.get('versionName', raw.get('version'))
+    if not isinstance(version_name, str) or not version_name.strip():
+        raise ValueError('versionName is required')
+    version_code = raw.get('versionCode')
+    if version_code is not None and (isinstance(version_code, bool) or not isinstance(version_code, int) or version_code < 1):
+        raise ValueError('versionCode must be a positive integer')
+    release_notes = raw.get('releaseNotes', '')
+    if not isinstance(release_notes, str):
+        raise ValueError('releaseNotes must be a string')
+    is_force_update = raw.get('isForceUpdate', False)
+    if not isinstance(is_force_update, bool):
+        raise ValueError('isForceUpdate must be a boolean')
+    
+    record = {
+        'versionName': version_name,
+        'versionCode': version_code,
+        'releaseNotes': release_notes,
+        'isForceUpdate': is_force_update
+    }
+    if 'rolloutPercentage' in raw:
+        record['rolloutPercentage'] = parse_percentage(raw['rolloutPercentage'])
+    if 'rolloutCohorts' in raw:
+        record['rolloutCohorts'] = parse_cohorts(raw['rolloutCohorts'], 'rolloutCohorts')
+    return record
+
+def plan_releases(releases: Iterable, existing: Mapping[str, int]) -> Tuple[List[Dict], List[Dict]]:
+    """(records, conflicts) of releases checked against the catalog's versionCodes by name and each other.
+    Releases are published in the order given: a release without a versionCode gets the next code after the
+    highest one in use (the previous release's included), and an explicit code must be above the previous release's."""
+    records = []
+    conflicts = []
+    names = set(existing)
+    codes = set(existing.values())
+    explicit = set()
+    parsed = []
+    for index, raw in enumerate(releases):
+        version_name = raw.get('versionName', raw.get('version')) if isinstance(raw, dict) else None
+        try:
+            record = release_record(raw)
+            if version_name in existing:
+                raise ValueError(f'Version {version_name} already exists')
+            if version_name in names:
+                raise ValueError(f'Version {version_name} appears more than once')
+            if record['versionCode'] in codes or record['versionCode'] in explicit:
+                raise ValueError(f"versionCode {record['versionCode']} is already used")
+        except ValueError as e:
+            conflicts.append({'index': index, 'versionName': version_name, 'error': str(e)})
+            continue
+        names.add(version_name)
+        if record['versionCode'] is not None:
+            explicit.add(record['versionCode'])
+        parsed.append((index, record))
+    
+    highest = max(codes, default=0)
+    previous = None
+    for index, record in parsed:
+        if record['versionCode'] is None:
+            code = highest + 1
+            if code in explicit:
+                conflicts.append({'index': index, 'versionName': record['versionName'],
+                                  'error': f'Next versionCode {code} is taken by a later release in the batch'})
+                continue
+            record['versionCode'] = code
+        elif previous is not None and record['versionCode'] <= previous['versionCode']:
+            conflicts.append({'index': index, 'versionName': record['versionName'],
+                              'error': f"versionCode {record['versionCode']} must be above the previous release's "
+                                       f"({previous['versionName']}, {previous['versionCode']})"})
+            continue
+        highest = max(highest, record['versionCode'])
+        previous = record
+        records.append(record)
+    conflicts.sort(key=lambda conflict: conflict['index'])
+    return records, conflicts
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+Staged rollouts for SnapUpdate Backend
+Stateless, deterministic device bucketing for percentage rollouts
+"""
+
+import zlib
+from typing import Dict, List, Optional
+
+ROLLOUT_BUCKETS = 10000
+
+def parse_percentage(value) -> float:
+    """Validate a rollout percentage (0-100)"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 100:
+        raise ValueError('percentage must be a number between 0 and 100')
+    return value
+
+def parse_cohorts(value, name: str = 'cohorts') -> List[str]:
+    """Validate rollout cohorts: a list of non-empty strings"""
+    if not isinstance(value, list) or not all(isinstance(cohort, str) and cohort for cohort in value):
+        raise ValueError(f'{name} must be a list of non-empty strings')
+    return list(value)
+
+def is_staged(version: Dict) -> bool:
+    """Check whether a version is not yet released to every device"""
+    return version.get('rolloutPercentage', 100) < 100
+
+def rollout_bucket(version_name: str, device_id: str) -> int:
+    """Stable bucket in [0, ROLLOUT_BUCKETS) for a device; salted per version so each release samples different devices"""
+    return zlib.crc32(f"{version_name}:{device_id}".encode('utf-8')) % ROLLOUT_BUCKETS
+
+def in_rollout(version: Dict, device_id: Optional[str] = None, cohort: Optional[str] = None) -> bool:
+    """Decide whether a device receives a version; raising the percentage only ever adds devices"""
+    percentage = version.get('rolloutPercentage', 100)
+    if percentage >= 100:
+        return True
+    if cohort and cohort in version.get('rolloutCohorts', ()):
+        return True
+    if not device_id or percentage <= 0:
+        return False
+    return rollout_bucket(version['versionName'], device_id) < percentage * ROLLOUT_BUCKETS / 100
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Statistics store for SnapUpdate Backend
+Buffers counters in memory and flushes them to per-worker shard files
+"""
+
+import os
+import json
+import uuid
+import atexit
+import time
+import socket
+import threading
+from datetime import datetime
+from typing import Dict
+
+from .fileutils import atomic_write_json, file_lock
+from .metrics import metrics
+
+class StatsStore:
+    """Thread-safe counters flushed in batches; totals are summed across worker shards on read"""
+    
+    def __init__(self, stats_file: str, flush_interval: float = 5.0, flush_every: int = 500):
+        self.stats_file = stats_file
+        self.shard_dir = os.path.join(os.path.dirname(stats_file), 'stats.d')
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+        self._shard_file = None
+        self._counts = {}
+        self._last_updated = None
+        self._pending = 0
+        self._pending_since = None
+        atexit.register(self.flush)
+    
+    def increment(self, stat_name: str, amount: int = 1):
+        """Add to a counter without touching the disk"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start_worker()
+            self._counts[stat_name] = self._counts.get(stat_name, 0) + amount
+            self._last_updated = datetime.now().isoformat()
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._wake.set()
+    
+    def _start_worker(self):
+        """Give this process its own shard and flusher (also after a fork)"""
+        self._pid = os.getpid()
+        self._shard_file = os.path.join(
+            self.shard_dir, f"{socket.gethostname()}-{self._pid}-{uuid.uuid4().hex[:8]}.json")
+        self._counts = {}
+        self._pending = 0
+        self._pending_since = None
+        self._wake = threading.Event()
+        threading.Thread(target=self._flush_loop, args=(self._wake,), name='stats-flusher', daemon=True).start()
+    
+    def _flush_loop(self, wake: threading.Event):
+        """Flush on a timer or as soon as enough events are buffered"""
+        self.compact()
+        while True:
+            wake.wait(self.flush_interval)
+            wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing stats: {e}")
+    
+    def flush(self):
+        """Write this worker's cumulative counters to its shard file"""
+        with self._write_lock:
+            with self._lock:
+                if not self._pending or self._pid != os.getpid():
+                    return
+                snapshot = {
+                    'pid': self._pid,
+                    'counts': dict(self._counts),
+                    'last_updated': self._last_updated
+                }
+                shard_file = self._shard_file
+                self._pending = 0
+                self._pending_since = None
+            started = time.perf_counter()
+            atomic_write_json(shard_file, snapshot, indent=None)
+            metrics.inc('snapupdate_stats_flushes_total')
+            metrics.observe('snapupdate_stats_flush_duration_seconds', (), time.perf_counter() - started)
+    
+    def flush_lag(self) -> float:
+        """Seconds the oldest unflushed increment has been waiting (0 when everything is on disk)"""
+        pending_since = self._pending_since
+        return time.monotonic() - pending_since if pending_since is not None and self._pid == os.getpid() else 0.0
+    
+    def pending(self) -> int:
+        """Increments buffered since the last flush"""
+        return self._pending if self._pid == os.getpid() else 0
+    
+    def read(self) -> Dict:
+        """Sum the base stats file, every worker shard and this worker's unflushed counts"""
+        with self._lock:
+            # A forked worker that hasn't counted yet still holds the parent's counts, which the parent's shard has
+            own = self._pid == os.getpid()
+            own_shard = self._shard_file if own else None
+            shards = [{'counts': dict(self._counts), 'last_updated': self._last_updated}] if own else []
+        # Shared with other readers, excluded while compact() moves dead shards into the base file
+        with file_lock(self.stats_file, shared=True):
+            stats = self._load_json(self.stats_file) or {}
+            for path in self._shard_files():
+                if path != own_shard:
+                    shards.append(self._load_json(path))
+        
+        for shard in shards:
+            if not shard:
+                continue
+            for name, value in shard.get('counts', {}).items():
+                stats[name] = stats.get(name, 0) + value
+            if shard.get('last_updated') and shard['last_updated'] > stats.get('last_updated', ''):
+                stats['last_updated'] = shard['last_updated']
+        return stats
+    
+    def compact(self):
+        """Fold shards left behind by exited workers on this host into the base stats file"""
+        hostname = socket.gethostname()
+        with file_lock(self.stats_file):
+            dead = []
+            for path in self._shard_files():
+                host, _, pid = os.path.basename(path).rpartition('-')[0].rpartition('-')
+                if host == hostname and pid.isdigit() and not self._pid_alive(int(pid)):
+                    dead.append(path)
+            if not dead:
+                return
+            
+            base = self._load_json(self.stats_file) or {}
+            for path in dead:
+                shard = self._load_json(path) or {}
+                for name, value in shard.get('counts', {}).items():
+                    base[name] = base.get(name, 0) + value
+                if shard.get('last_updated') and shard['last_updated'] > base.get('last_updated', ''):
+                    base['last_updated'] = shard['last_updated']
+            atomic_write_json(self.stats_file, base)
+            for path in dead:
+                os.remove(path)
+    
+    def _shard_files(self):
+        """List shard files of all workers"""
+        try:
+            names = os.listdir(self.shard_dir)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.shard_dir, name) for name in names if name.endswith('.json') and not name.startswith('.')]
+    
+    @staticmethod
+    def _load_json(path: str):
+        """Read a JSON file, treating a missing or half-written file as empty"""
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+    
+    @staticmethod
+    def _pid_alive(pid: int) -> bool:
+        """Check whether a process with this pid still exists"""
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
\ No newline at end of file
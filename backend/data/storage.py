@@ -0,0 +1,311 @@
+"""
+Version storage for SnapUpdate Backend
+Pluggable catalog backends: crash-safe versions.json (default) and SQLite
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from .fileutils import atomic_write_json, file_lock
+
+REVISION_KEY = '_revision'
+# Root of versions/, apks/, stats and apps.json; point it elsewhere to run against a scratch copy
+DATA_DIR = os.getenv('SNAPUPDATE_DATA_DIR', os.path.dirname(os.path.abspath(__file__)))
+VERSIONS_DIR = os.path.join(DATA_DIR, 'versions')
+DEFAULT_APP_ID = 'snapupdate'
+DEFAULT_CHANNEL = 'stable'
+
+# (database, catalog, pid) whose schema and revision row this process has already set up
+_SQLITE_READY = set()
+_SQLITE_SETUP_LOCK = threading.Lock()
+
+class VersionStore:
+    """Storage backend interface used by VersionManager"""
+    
+    def stamp(self):
+        """Cheap change marker; differs after every committed write"""
+        raise NotImplementedError
+    
+    def exists(self) -> bool:
+        """Check whether the catalog has ever been written (an emptied catalog still exists)"""
+        raise NotImplementedError
+    
+    def load(self) -> Tuple[int, Dict]:
+        """Read (revision, versions by name) as one consistent snapshot"""
+        raise NotImplementedError
+    
+    def get(self, version_name: str) -> Optional[Dict]:
+        """Read a single version by name"""
+        raise NotImplementedError
+    
+    def max_version_code(self) -> int:
+        """Highest versionCode currently stored (0 when empty)"""
+        raise NotImplementedError
+    
+    def version_codes(self) -> Dict[str, int]:
+        """versionCode of every stored version by name"""
+        raise NotImplementedError
+    
+    def transaction(self):
+        """Context manager yielding a mutable mapping of versions by name.
+        Commits (and bumps the revision) if the block changed anything and did not raise."""
+        raise NotImplementedError
+
+class _JsonTransaction(dict):
+    """Mutable view of the catalog inside a locked transaction"""
+    
+    def max_version_code(self) -> int:
+        """Highest versionCode currently stored"""
+        return max((v['versionCode'] for v in self.values()), default=0)
+    
+    def version_codes(self) -> Dict[str, int]:
+        """versionCode of every stored version by name"""
+        return {name: v['versionCode'] for name, v in self.items()}
+
+class JsonVersionStore(VersionStore):
+    """Stores versions in one JSON file, replaced atomically and guarded by an advisory lock"""
+    
+    def __init__(self, versions_file: str):
+        self.versions_file = versions_file
+    
+    def stamp(self):
+        """Cheap change marker (a single stat call); changes on every committed write"""
+        try:
+            st = os.stat(self.versions_file)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+    
+    def exists(self) -> bool:
+        """Check whether the catalog has been written yet"""
+        return os.path.exists(self.versions_file)
+    
+    def load(self) -> Tuple[int, Dict]:
+        """Read (revision, versions by name); safe without a lock since writers replace the file atomically"""
+        try:
+            with open(self.versions_file, 'r') as f:
+                versions_data = json.load(f)
+        except FileNotFoundError:
+            return 0, {}
+        revision = versions_data.pop(REVISION_KEY, 0)
+        return revision, versions_data
+    
+    def get(self, version_name: str) -> Optional[Dict]:
+        """Read a single version by name"""
+        return self.load()[1].get(version_name)
+    
+    def max_version_code(self) -> int:
+        """Highest versionCode currently stored"""
+        return _JsonTransaction(self.load()[1]).max_version_code()
+    
+    def version_codes(self) -> Dict[str, int]:
+        """versionCode of every stored version by name"""
+        return _JsonTransaction(self.load()[1]).version_codes()
+    
+    @contextmanager
+    def transaction(self):
+        """Locked read-modify-write; commits a new revision if the block changed anything and did not raise"""
+        with file_lock(self.versions_file):
+            revision, versions_data = self.load()
+            before = json.dumps(versions_data, sort_keys=True)
+            txn = _JsonTransaction(versions_data)
+            yield txn
+            if json.dumps(txn, sort_keys=True) != before or not self.exists():
+                atomic_write_json(self.versions_file, {REVISION_KEY: revision + 1, **txn})
+
+class _SqliteTransaction(MutableMapping):
+    """Mapping of one catalog's versions by name backed by an open SQLite write transaction"""
+    
+    def __init__(self, conn: sqlite3.Connection, catalog: str):
+        self.conn = conn
+        self.catalog = catalog
+        self.changed = False
+    
+    def __getitem__(self, version_name: str) -> Dict:
+        row = self.conn.execute(
+            'SELECT data FROM versions WHERE catalog = ? AND versionName = ?', (self.catalog, version_name)).fetchone()
+        if row is None:
+            raise KeyError(version_name)
+        return json.loads(row[0])
+    
+    def __setitem__(self, version_name: str, record: Dict):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO versions (catalog, versionName, versionCode, data) VALUES (?, ?, ?, ?)',
+            (self.catalog, version_name, record['versionCode'], json.dumps(record)))
+        self.changed = True
+    
+    def __delitem__(self, version_name: str):
+        cursor = self.conn.execute('DELETE FROM versions WHERE catalog = ? AND versionName = ?', (self.catalog, version_name))
+        if cursor.rowcount == 0:
+            raise KeyError(version_name)
+        self.changed = True
+    
+    def __iter__(self):
+        rows = self.conn.execute('SELECT versionName FROM versions WHERE catalog = ? ORDER BY versionCode', (self.catalog,))
+        return iter([row[0] for row in rows])
+    
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM versions WHERE catalog = ?', (self.catalog,)).fetchone()[0]
+    
+    def __contains__(self, version_name) -> bool:
+        row = self.conn.execute(
+            'SELECT 1 FROM versions WHERE catalog = ? AND versionName = ?', (self.catalog, version_name)).fetchone()
+        return row is not None
+    
+    def clear(self):
+        self.conn.execute('DELETE FROM versions WHERE catalog = ?', (self.catalog,))
+        self.changed = True
+    
+    def max_version_code(self) -> int:
+        """Highest versionCode currently stored (index lookup)"""
+        return self.conn.execute(
+            'SELECT COALESCE(MAX(versionCode), 0) FROM versions WHERE catalog = ?', (self.catalog,)).fetchone()[0]
+    
+    def version_codes(self) -> Dict[str, int]:
+        """versionCode of every stored version by name (one query, without decoding the records)"""
+        return _version_codes(self.conn, self.catalog)
+
+def _version_codes(conn: sqlite3.Connection, catalog: str) -> Dict[str, int]:
+    return dict(conn.execute('SELECT versionName, versionCode FROM versions WHERE catalog = ?', (catalog,)))
+
+class SqliteVersionStore(VersionStore):
+    """Stores one catalog's versions in SQLite (WAL mode) with indexed lookups and row-level writes.
+    Several catalogs (app/channel pairs) can share one database file."""
+    
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS versions (
+            catalog TEXT NOT NULL,
+            versionName TEXT NOT NULL,
+            versionCode INTEGER NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_versions_name ON versions (catalog, versionName);
+        CREATE INDEX IF NOT EXISTS idx_versions_code ON versions (catalog, versionCode);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    '''
+    
+    def __init__(self, db_path: str, catalog: str = f'{DEFAULT_APP_ID}/{DEFAULT_CHANNEL}'):
+        self.db_path = db_path
+        self.catalog = catalog
+        self.revision_key = f'revision:{catalog}'
+        self._local = threading.local()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Per-thread (and per-process) connection, created on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        setup = (os.path.abspath(self.db_path), self.catalog, os.getpid())
+        if setup not in _SQLITE_READY:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        if setup not in _SQLITE_READY:
+            # Schema, legacy upgrade and the revision row once per process; later threads only connect
+            with _SQLITE_SETUP_LOCK:
+                if setup not in _SQLITE_READY:
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    self._upgrade_legacy_schema(conn)
+                    conn.executescript(self.SCHEMA)
+                    conn.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, 0)', (self.revision_key,))
+                    _SQLITE_READY.add(setup)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+    
+    def _upgrade_legacy_schema(self, conn: sqlite3.Connection):
+        """Move a single-catalog database (no catalog column) into the default catalog"""
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(versions)')]
+        if not columns or 'catalog' in columns:
+            return
+        default_catalog = f'{DEFAULT_APP_ID}/{DEFAULT_CHANNEL}'
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(versions)')]
+            if 'catalog' not in columns:
+                conn.execute(f"ALTER TABLE versions ADD COLUMN catalog TEXT NOT NULL DEFAULT '{default_catalog}'")
+                conn.execute('DROP INDEX IF EXISTS idx_versions_name')
+                conn.execute('DROP INDEX IF EXISTS idx_versions_code')
+                conn.execute("UPDATE meta SET key = ? WHERE key = 'revision'", (f'revision:{default_catalog}',))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+    
+    def _revision(self, conn: sqlite3.Connection) -> int:
+        return conn.execute('SELECT value FROM meta WHERE key = ?', (self.revision_key,)).fetchone()[0]
+    
+    def stamp(self):
+        """Catalog revision (one primary-key lookup)"""
+        return self._revision(self._connect())
+    
+    def exists(self) -> bool:
+        """Check whether the catalog has been written yet (every commit bumps its revision)"""
+        return self.stamp() > 0
+    
+    def load(self) -> Tuple[int, Dict]:
+        """Read (revision, versions by name) inside one read transaction"""
+        conn = self._connect()
+        conn.execute('BEGIN')
+        try:
+            revision = self._revision(conn)
+            rows = conn.execute(
+                'SELECT versionName, data FROM versions WHERE catalog = ? ORDER BY versionCode', (self.catalog,)).fetchall()
+        finally:
+            conn.execute('COMMIT')
+        return revision, {name: json.loads(data) for name, data in rows}
+    
+    def get(self, version_name: str) -> Optional[Dict]:
+        """Read a single version by name (index lookup)"""
+        row = self._connect().execute(
+            'SELECT data FROM versions WHERE catalog = ? AND versionName = ?', (self.catalog, version_name)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def max_version_code(self) -> int:
+        """Highest versionCode currently stored (index lookup)"""
+        return self._connect().execute(
+            'SELECT COALESCE(MAX(versionCode), 0) FROM versions WHERE catalog = ?', (self.catalog,)).fetchone()[0]
+    
+    def version_codes(self) -> Dict[str, int]:
+        """versionCode of every stored version by name (one query)"""
+        return _version_codes(self._connect(), self.catalog)
+    
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE write transaction; bumps the revision only if rows changed"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            txn = _SqliteTransaction(conn, self.catalog)
+            yield txn
+            if txn.changed:
+                conn.execute('UPDATE meta SET value = value + 1 WHERE key = ?', (self.revision_key,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+def catalog_dir(app_id: str, channel: str) -> str:
+    """Directory holding one (app, channel) catalog; the default catalog keeps the original data/versions layout"""
+    if app_id == DEFAULT_APP_ID and channel == DEFAULT_CHANNEL:
+        return VERSIONS_DIR
+    return os.path.join(VERSIONS_DIR, app_id, channel)
+
+def open_version_store(app_id: str = None, channel: str = None, backend: Optional[str] = None) -> VersionStore:
+    """Create the configured backend for a catalog (SNAPUPDATE_STORAGE=json|sqlite, SNAPUPDATE_DB=path)"""
+    app_id = app_id or DEFAULT_APP_ID
+    channel = channel or DEFAULT_CHANNEL
+    backend = (backend or os.getenv('SNAPUPDATE_STORAGE', 'json')).lower()
+    if backend == 'sqlite':
+        return SqliteVersionStore(os.getenv('SNAPUPDATE_DB', os.path.join(VERSIONS_DIR, 'versions.db')), f'{app_id}/{channel}')
+    if backend == 'json':
+        return JsonVersionStore(os.path.join(catalog_dir(app_id, channel), 'versions.json'))
+    raise ValueError(f"Unknown storage backend: {backend}")
\ No newline at end of file
@@ -4,104 +4,278 @@ Handles version data and APK file management
 """
 
 import os
-import json
+import time
+import bisect
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .apk_index import ApkIndex
+from .apk_manifest import is_compatible
+from .apps import DEFAULT_APPS, build_download_url, load_apps
+from .metrics import metrics
+from .notifier import ChangeNotifier
+from .patches import PATCH_HISTORY, PatchManager
+from .releases import plan_releases
+from .rollout import in_rollout, is_staged
+from .stats import StatsStore
+from .storage import DATA_DIR, DEFAULT_APP_ID, DEFAULT_CHANNEL, VersionStore, catalog_dir, open_version_store
+from .versioning import version_key
+
+# Demo versions written by seed_demo_data() (python manage.py seed)
+DEMO_VERSIONS = {
+    "1.0": {
+        "versionCode": 1,
+        "versionName": "1.0",
+        "releaseNotes": "Initial release with basic update functionality",
+        "downloadUrl": "https://github.com/kariemSeiam/snapupdate/raw/refs/heads/master/backend/data/apks/SnapUpdate-v1.0.apk",
+        "isForceUpdate": False,
+        "createdAt": "2024-01-01T00:00:00Z"
+    },
+    "1.1": {
+        "versionCode": 2,
+        "versionName": "1.1",
+        "releaseNotes": "Enhanced UI/UX with Material 3 design",
+        "downloadUrl": "https://github.com/kariemSeiam/snapupdate/raw/refs/heads/master/backend/data/apks/SnapUpdate-v1.1.apk",
+        "isForceUpdate": False,
+        "createdAt": "2024-01-15T00:00:00Z"
+    },
+    "1.2": {
+        "versionCode": 3,
+        "versionName": "1.2",
+        "releaseNotes": "Added auto-installation feature and improved performance",
+        "downloadUrl": "https://github.com/kariemSeiam/snapupdate/raw/refs/heads/master/backend/data/apks/SnapUpdate-v1.2.apk",
+        "isForceUpdate": True,
+        "createdAt": "2024-01-30T00:00:00Z"
+    }
+}
+
+class CatalogSnapshot:
+    """Parsed snapshot of the version catalog with precomputed lookups"""
+    
+    def __init__(self, versions_data: Dict, stamp, revision: int):
+        self.stamp = stamp
+        self.revision = revision
+        self.versions = list(versions_data.values())
+        self.by_name = {v['versionName']: v for v in self.versions}
+        self.latest = max(self.versions, key=lambda x: x['versionCode']) if self.versions else None
+        self.ordered = sorted(self.versions, key=lambda x: x['versionCode'])
+        self.codes = [v['versionCode'] for v in self.ordered]
+        
+        # Versions sorted by parsed name, with the highest-code version at or after each position
+        self.keys = {v['versionName']: version_key(v['versionName']) for v in self.versions}
+        ranked = sorted(
+            ((self.keys[v['versionName']], v['versionCode'], v) for v in self.versions if self.keys[v['versionName']] is not None),
+            key=lambda item: (item[0], item[1]))
+        self.rank_keys = [item[0] for item in ranked]
+        self.best_from = [None] * (len(ranked) + 1)
+        for index in range(len(ranked) - 1, -1, -1):
+            best = self.best_from[index + 1]
+            candidate = ranked[index][2]
+            self.best_from[index] = candidate if best is None or candidate['versionCode'] > best['versionCode'] else best
+        
+        # Whether any version is in a staged rollout (answers then depend on the device)
+        self.staged = any(is_staged(v) for v in self.versions)
+    
+    def latest_for(self, device_id: Optional[str] = None, cohort: Optional[str] = None,
+                   compatible: Optional[Callable[[Dict], bool]] = None) -> Optional[Dict]:
+        """Newest version the device is rolled out to (and, given a compatible() filter, can install)"""
+        for version in reversed(self.ordered):
+            if (not self.staged or in_rollout(version, device_id, cohort)) and (compatible is None or compatible(version)):
+                return version
+        return None
+    
+    def find_update(self, current_version: Optional[str] = None, current_code: Optional[int] = None,
+                    device_id: Optional[str] = None, cohort: Optional[str] = None,
+                    compatible: Optional[Callable[[Dict], bool]] = None) -> Optional[Dict]:
+        """Newest version newer than the client's versionCode or versionName that the device is rolled out to
+        (and, given a compatible() filter, can install)"""
+        if current_code is not None:
+            best = self.latest if self.latest and self.latest['versionCode'] > current_code else None
+        else:
+            key = version_key(current_version)
+            if key is None:
+                return None
+            best = self.best_from[bisect.bisect_right(self.rank_keys, key)]
+        if best is None or ((not self.staged or in_rollout(best, device_id, cohort))
+                            and (compatible is None or compatible(best))):
+            return best
+        
+        # Device is outside the newest release's rollout (or cannot install it): fall back to the newest one it can take
+        for version in reversed(self.ordered):
+            if version['versionCode'] >= best['versionCode']:
+                continue
+            if current_code is not None:
+                newer = version['versionCode'] > current_code
+            else:
+                newer = self.keys[version['versionName']] is not None and self.keys[version['versionName']] > key
+            if newer and in_rollout(version, device_id, cohort) and (compatible is None or compatible(version)):
+                return version
+        return None
 
 class VersionManager:
-    """Manages app versions and APK files"""
-    
-    def __init__(self):
-        self.data_dir = os.path.join(os.path.dirname(__file__), 'versions')
-        self.apk_dir = os.path.join(os.path.dirname(__file__), 'apks')
-        self.stats_file = os.path.join(os.path.dirname(__file__), 'stats.json')
-        os.makedirs(self.data_dir, exist_ok=True)
-        os.makedirs(self.apk_dir, exist_ok=True)
-        self._init_demo_data()
-    
-    def _init_demo_data(self):
-        """Initialize demo version data with GitHub download links"""
-        self.demo_versions = {
-            "1.0": {
-                "versionCode": 1,
-                "versionName": "1.0",
-                "releaseNotes": "Initial release with basic update functionality",
-                "downloadUrl": "https://github.com/kariemSeiam/snapupdate/raw/refs/heads/master/backend/data/apks/SnapUpdate-v1.0.apk",
-                "isForceUpdate": False,
-                "createdAt": "2024-01-01T00:00:00Z"
-            },
-            "1.1": {
-                "versionCode": 2,
-                "versionName": "1.1",
-                "releaseNotes": "Enhanced UI/UX with Material 3 design",
-                "downloadUrl": "https://github.com/kariemSeiam/snapupdate/raw/refs/heads/master/backend/data/apks/SnapUpdate-v1.1.apk",
-                "isForceUpdate": False,
-                "createdAt": "2024-01-15T00:00:00Z"
-            },
-            "1.2": {
-                "versionCode": 3,
-                "versionName": "1.2",
-                "releaseNotes": "Added auto-installation feature and improved performance",
-                "downloadUrl": "https://github.com/kariemSeiam/snapupdate/raw/refs/heads/master/backend/data/apks/SnapUpdate-v1.2.apk",
-                "isForceUpdate": True,
-                "createdAt": "2024-01-30T00:00:00Z"
-            }
-        }
-        self._save_versions()
-        # Remove auto-creation of APK files - keep them static
-        print("✅ Version manager initialized with GitHub download links")
+    """Manages app versions and APK files of one (appId, channel) catalog"""
+    
+    def __init__(self, app_id: str = DEFAULT_APP_ID, channel: str = DEFAULT_CHANNEL, store: Optional[VersionStore] = None,
+                 app_config: Optional[Dict] = None, stats: Optional[StatsStore] = None,
+                 notifier: Optional[ChangeNotifier] = None):
+        self.app_id = app_id
+        self.channel = channel
+        self.app_config = app_config or DEFAULT_APPS[DEFAULT_APP_ID]
+        self.data_dir = catalog_dir(app_id, channel)
+        self.apk_dir = os.path.join(DATA_DIR, 'apks')
+        if app_id != DEFAULT_APP_ID:
+            self.apk_dir = os.path.join(self.apk_dir, app_id)
+        self.stats_file = os.path.join(DATA_DIR, 'stats.json')
+        self._catalog = None
+        self._catalog_lock = threading.Lock()
+        self.store = store or open_version_store(app_id, channel)
+        self.stats = stats or StatsStore(self.stats_file)
+        self.notifier = notifier
+        self.apk_index = ApkIndex(self.apk_dir, self.app_config['apkPrefix'])
+        self.patches = PatchManager(self.apk_index)
+    
+    def seed_demo_data(self, force: bool = False) -> bool:
+        """Write the demo versions if the catalog is empty (or always with force); returns True if seeded"""
+        with self.store.transaction() as versions_data:
+            if versions_data and not force:
+                return False
+            versions_data.clear()
+            versions_data.update(DEMO_VERSIONS)
+        self._invalidate_catalog()
+        print("✅ Seeded demo versions with GitHub download links")
+        return True
     
     def _create_demo_apks(self):
         """This method is now disabled - APK files are kept static"""
         print("ℹ️ APK files are kept static - no auto-creation")
         pass
     
-    def _save_versions(self):
-        """Save versions to JSON file"""
-        versions_file = os.path.join(self.data_dir, 'versions.json')
-        with open(versions_file, 'w') as f:
-            json.dump(self.demo_versions, f, indent=2)
+    def _get_catalog(self) -> CatalogSnapshot:
+        """Return the cached catalog, reloading it only when the store changed"""
+        stamp = self.store.stamp()
+        catalog = self._catalog
+        if catalog is not None and catalog.stamp == stamp:
+            return catalog
+        
+        with self._catalog_lock:
+            catalog = self._catalog
+            if catalog is None or catalog.stamp != stamp:
+                catalog = self._load_catalog(stamp)
+                self._catalog = catalog
+            return catalog
+    
+    def _load_catalog(self, stamp) -> CatalogSnapshot:
+        """Load the store into a fresh catalog snapshot"""
+        if stamp is None:
+            return CatalogSnapshot({}, None, 0)
+        started = time.perf_counter()
+        revision, versions_data = self.store.load()
+        catalog = CatalogSnapshot(versions_data, stamp, revision)
+        labels = (('app', self.app_id), ('channel', self.channel))
+        metrics.inc('snapupdate_catalog_reloads_total', labels)
+        metrics.observe('snapupdate_catalog_reload_duration_seconds', labels, time.perf_counter() - started)
+        return catalog
+    
+    def _invalidate_catalog(self):
+        """Drop the cached catalog after this process wrote to the store and wake waiting update streams"""
+        self._catalog = None
+        if self.notifier is not None:
+            self.notifier.notify((self.app_id, self.channel))
+    
+    def get_catalog(self) -> CatalogSnapshot:
+        """Get the current immutable catalog snapshot (a new object whenever the catalog changes)"""
+        return self._get_catalog()
+    
+    def get_catalog_revision(self) -> int:
+        """Get the monotonically increasing revision of the current catalog"""
+        return self._get_catalog().revision
+    
+    def find_update(self, current_version: Optional[str] = None, current_code: Optional[int] = None,
+                    device_id: Optional[str] = None, cohort: Optional[str] = None,
+                    sdk: Optional[int] = None, abis: Optional[List[str]] = None) -> Optional[Dict]:
+        """Get the version a client should update to, or None if it is up to date (or on an unknown build);
+        sdk/abis skip releases whose indexed APK the device cannot install"""
+        compatible = None
+        if sdk is not None or abis:
+            manifests = self.apk_index.manifests()
+            compatible = lambda version: is_compatible(manifests.get(version['versionName']), sdk, abis)
+        return self._get_catalog().find_update(current_version, current_code, device_id, cohort, compatible)
     
     def get_latest_version(self) -> Dict:
         """Get the latest version available"""
-        versions = self.get_all_versions()
-        if versions:
-            return max(versions, key=lambda x: x['versionCode'])
-        return None
+        return self._get_catalog().latest
     
     def get_all_versions(self) -> List[Dict]:
         """Get all available versions"""
-        versions_file = os.path.join(self.data_dir, 'versions.json')
-        if os.path.exists(versions_file):
-            with open(versions_file, 'r') as f:
-                versions_data = json.load(f)
-                return list(versions_data.values())
-        return list(self.demo_versions.values())
+        return list(self._get_catalog().versions)
     
     def get_version(self, version_name: str) -> Optional[Dict]:
         """Get specific version by name"""
-        versions = self.get_all_versions()
-        return next((v for v in versions if v['versionName'] == version_name), None)
+        return self._get_catalog().by_name.get(version_name)
+    
+    def get_versions_page(self, after_code: Optional[int] = None, limit: Optional[int] = None) -> Tuple[List[Dict], Optional[int]]:
+        """Get versions ordered by versionCode after a code (bisect), plus the code to resume from"""
+        catalog = self._get_catalog()
+        start = bisect.bisect_right(catalog.codes, after_code) if after_code is not None else 0
+        end = len(catalog.ordered) if limit is None else min(start + limit, len(catalog.ordered))
+        page = catalog.ordered[start:end]
+        next_after = page[-1]['versionCode'] if page and end < len(catalog.ordered) else None
+        return page, next_after
     
     def get_apk_path(self, version: str) -> str:
         """Get APK file path for version"""
-        return os.path.join(self.apk_dir, f"SnapUpdate-v{version}.apk")
+        return os.path.join(self.apk_dir, f"{self.app_config['apkPrefix']}{version}.apk")
+    
+    def get_download_url(self, version_name: str) -> str:
+        """Get the download URL of a version from the app's URL template"""
+        return build_download_url(self.app_config, self.app_id, self.channel, version_name)
     
     def get_all_available_apks(self) -> List[str]:
         """Get all available APK files on server (regardless of version management)"""
         try:
-            apk_files = []
-            if os.path.exists(self.apk_dir):
-                for file in os.listdir(self.apk_dir):
-                    if file.endswith('.apk'):
-                        # Extract version from filename (e.g., "SnapUpdate-v1.0.apk" -> "1.0")
-                        version = file.replace('SnapUpdate-v', '').replace('.apk', '')
-                        apk_files.append(version)
-            return sorted(apk_files)
+            return list(self.apk_index.versions())
         except Exception as e:
             print(f"Error getting available APKs: {e}")
             return []
     
+    def get_apk_info(self, version: str) -> Optional[Dict]:
+        """Get path, size, mtime and cached SHA-256 of a version's APK (None if not on disk)"""
+        return self.apk_index.file_info(version)
+    
+    def get_apk_manifests(self) -> Dict[str, Dict]:
+        """Get the indexed APK metadata (manifest, ABIs, signer, size, hash) per version, from memory"""
+        return self.apk_index.manifests()
+    
+    def set_rollout(self, version_name: str, percentage: float, cohorts: Optional[List[str]] = None) -> bool:
+        """Raise or lower the share of devices (0-100) that are offered a version"""
+        rollout = {'rolloutPercentage': percentage}
+        if cohorts is not None:
+            rollout['rolloutCohorts'] = cohorts
+        return self.update_version(version_name, rollout)
+    
+    def get_patch(self, from_version: str, to_version: str) -> Optional[Dict]:
+        """Get metadata of a cached delta patch between two versions (None if not built yet)"""
+        return self.patches.get(from_version, to_version)
+    
+    def _patch_targets(self) -> Tuple[Optional[str], List[str]]:
+        """(latest version, recent older versions) that delta patches are built between"""
+        catalog = self._get_catalog()
+        if not catalog.latest:
+            return None, []
+        older = [v['versionName'] for v in catalog.ordered if v['versionCode'] < catalog.latest['versionCode']]
+        return catalog.latest['versionName'], older[-PATCH_HISTORY:]
+    
+    def schedule_patches(self) -> bool:
+        """Queue background builds of patches from recent versions to the latest one; returns at once"""
+        latest, older = self._patch_targets()
+        return latest is not None and self.patches.schedule(latest, older)
+    
+    def build_patches(self) -> List[Dict]:
+        """Build the missing or stale patches from recent versions to the latest one now; returns those built"""
+        latest, older = self._patch_targets()
+        return self.patches.build(latest, older) if latest is not None else []
+    
     def apk_exists(self, version: str) -> bool:
         """Check if APK file exists for version"""
         apk_path = self.get_apk_path(version)
@@ -113,31 +287,29 @@ class VersionManager:
         return (latest['versionCode'] + 1) if latest else 1
     
     def add_version(self, version_data: Dict) -> bool:
-        """Add new version with GitHub download link"""
+        """Add new version with the app's download link"""
         try:
-            versions_file = os.path.join(self.data_dir, 'versions.json')
-            versions_data = {}
-            
-            if os.path.exists(versions_file):
-                with open(versions_file, 'r') as f:
-                    versions_data = json.load(f)
-            
             version_name = version_data['versionName']
             
-            # Create GitHub download link
-            github_download_url = f"https://github.com/kariemSeiam/snapupdate/raw/refs/heads/master/backend/data/apks/SnapUpdate-v{version_name}.apk"
-            
-            versions_data[version_name] = {
-                **version_data,
-                'downloadUrl': github_download_url,
-                'createdAt': datetime.now().isoformat() + 'Z'
-            }
+            # Download link from the app's URL template
+            download_url = self.get_download_url(version_name)
             
-            with open(versions_file, 'w') as f:
-                json.dump(versions_data, f, indent=2)
+            with self.store.transaction() as versions_data:
+                # Assign the next code under the lock so concurrent adds never collide
+                if version_data.get('versionCode') is None:
+                    version_data = {**version_data, 'versionCode': versions_data.max_version_code() + 1}
+                versions_data[version_name] = {
+                    **version_data,
+                    'downloadUrl': download_url,
+                    'createdAt': datetime.now().isoformat() + 'Z'
+                }
+            self._invalidate_catalog()
             
             # Don't create local APK files - keep them static
-            print(f"✅ Added version {version_name} with GitHub download link: {github_download_url}")
+            print(f"✅ Added version {version_name} with download link: {download_url}")
+            
+            # Delta patches to the new latest version are built off the request path
+            self.schedule_patches()
             
             self.increment_stat('versions_created')
             return True
@@ -145,24 +317,52 @@ class VersionManager:
             print(f"Error adding version: {e}")
             return False
     
+    def publish_versions(self, releases: List, dry_run: bool = False) -> Dict:
+        """Add many versions as one catalog revision (a single store write), or none of them on any conflict"""
+        if dry_run:
+            records, conflicts = plan_releases(releases, self.store.version_codes())
+        else:
+            created_at = datetime.now().isoformat() + 'Z'
+            with self.store.transaction() as versions_data:
+                # Checked under the store lock, so a concurrent write can't slip in between check and commit
+                records, conflicts = plan_releases(releases, versions_data.version_codes())
+                if not conflicts:
+                    for record in records:
+                        versions_data[record['versionName']] = {
+                            **record,
+                            'downloadUrl': self.get_download_url(record['versionName']),
+                            'createdAt': created_at
+                        }
+        
+        committed = not dry_run and not conflicts and bool(records)
+        if committed:
+            self._invalidate_catalog()
+            print(f"✅ Published {len(records)} version(s) in one revision")
+            self.schedule_patches()
+            self.increment_stat('versions_created', len(records))
+        return {
+            'dryRun': dry_run,
+            'committed': committed,
+            'versions': [{'versionName': r['versionName'], 'versionCode': r['versionCode']} for r in records],
+            'conflicts': conflicts,
+            'revision': self.get_catalog_revision()
+        }
+    
     def update_version(self, version_name: str, version_data: Dict) -> bool:
         """Update existing version"""
         try:
-            versions_file = os.path.join(self.data_dir, 'versions.json')
-            if os.path.exists(versions_file):
-                with open(versions_file, 'r') as f:
-                    versions_data = json.load(f)
-                
-                if version_name in versions_data:
-                    versions_data[version_name].update(version_data)
-                    versions_data[version_name]['updatedAt'] = datetime.now().isoformat() + 'Z'
-                    
-                    with open(versions_file, 'w') as f:
-                        json.dump(versions_data, f, indent=2)
-                    
-                    self.increment_stat('versions_updated')
-                    return True
-            return False
+            with self.store.transaction() as versions_data:
+                if version_name not in versions_data:
+                    return False
+                versions_data[version_name] = {
+                    **versions_data[version_name],
+                    **version_data,
+                    'updatedAt': datetime.now().isoformat() + 'Z'
+                }
+            self._invalidate_catalog()
+            
+            self.increment_stat('versions_updated')
+            return True
         except Exception as e:
             print(f"Error updating version: {e}")
             return False
@@ -170,52 +370,43 @@ class VersionManager:
     def delete_version(self, version_name: str) -> bool:
         """Delete version"""
         try:
-            versions_file = os.path.join(self.data_dir, 'versions.json')
-            if os.path.exists(versions_file):
-                with open(versions_file, 'r') as f:
-                    versions_data = json.load(f)
-                
-                if version_name in versions_data:
-                    del versions_data[version_name]
-                    
-                    with open(versions_file, 'w') as f:
-                        json.dump(versions_data, f, indent=2)
-                    
-                    # Delete APK file
-                    apk_path = self.get_apk_path(version_name)
-                    if os.path.exists(apk_path):
-                        os.remove(apk_path)
-                    
-                    self.increment_stat('versions_deleted')
-                    return True
-            return False
+            with self.store.transaction() as versions_data:
+                if version_name not in versions_data:
+                    return False
+                del versions_data[version_name]
+            self._invalidate_catalog()
+            
+            # Delete APK file
+            apk_path = self.get_apk_path(version_name)
+            if os.path.exists(apk_path):
+                os.remove(apk_path)
+            
+            self.increment_stat('versions_deleted')
+            return True
         except Exception as e:
             print(f"Error deleting version: {e}")
             return False
     
     def reset_to_version(self, version_data: Dict) -> bool:
-        """Reset to specific version with GitHub download link"""
+        """Reset to specific version with the app's download link"""
         try:
-            versions_file = os.path.join(self.data_dir, 'versions.json')
             version_name = version_data['versionName']
             
-            # Create GitHub download link
-            github_download_url = f"https://github.com/kariemSeiam/snapupdate/raw/refs/heads/master/backend/data/apks/SnapUpdate-v{version_name}.apk"
+            # Download link from the app's URL template
+            download_url = self.get_download_url(version_name)
             
             # Clear all existing versions and create new reset version
-            versions_data = {
-                version_name: {
+            with self.store.transaction() as versions_data:
+                versions_data.clear()
+                versions_data[version_name] = {
                     **version_data,
-                    'downloadUrl': github_download_url,
+                    'downloadUrl': download_url,
                     'createdAt': datetime.now().isoformat() + 'Z'
                 }
-            }
-            
-            with open(versions_file, 'w') as f:
-                json.dump(versions_data, f, indent=2)
+            self._invalidate_catalog()
             
             # Don't create local APK files - keep them static
-            print(f"✅ Reset to version {version_name} with GitHub download link: {github_download_url}")
+            print(f"✅ Reset to version {version_name} with download link: {download_url}")
             
             self.increment_stat('versions_reset')
             return True
@@ -225,23 +416,66 @@ class VersionManager:
     
     def get_stats(self) -> Dict:
         """Get server statistics"""
-        if os.path.exists(self.stats_file):
-            with open(self.stats_file, 'r') as f:
-                return json.load(f)
-        return {
-            'total_versions': len(self.get_all_versions()),
+        stats = {
             'versions_created': 0,
             'versions_updated': 0,
             'versions_deleted': 0,
             'downloads': 0,
             'last_updated': datetime.now().isoformat()
         }
+        stats.update(self.stats.read())
+        stats['total_versions'] = len(self._get_catalog().versions)
+        return stats
+    
+    def increment_stat(self, stat_name: str, amount: int = 1):
+        """Increment statistics counter (buffered, flushed in batches)"""
+        self.stats.increment(stat_name, amount)
+
+class CatalogRegistry:
+    """One VersionManager (catalog snapshot, indexes and caches) per (appId, channel), created on first use"""
     
-    def increment_stat(self, stat_name: str):
-        """Increment statistics counter"""
-        stats = self.get_stats()
-        stats[stat_name] = stats.get(stat_name, 0) + 1
-        stats['last_updated'] = datetime.now().isoformat()
+    def __init__(self, apps: Optional[Dict[str, Dict]] = None):
+        self.apps = apps if apps is not None else load_apps()
+        self.stats = StatsStore(os.path.join(DATA_DIR, 'stats.json'))
+        self.notifier = ChangeNotifier()
+        self._managers = {}
+        self._lock = threading.Lock()
+    
+    def get(self, app_id: Optional[str] = None, channel: Optional[str] = None) -> VersionManager:
+        """Get the manager of an app channel; raises KeyError for unknown apps or channels"""
+        app_id = app_id or DEFAULT_APP_ID
+        manager = self._managers.get((app_id, channel))
+        if manager is not None:
+            return manager
         
-        with open(self.stats_file, 'w') as f:
-            json.dump(stats, f, indent=2) 
\ No newline at end of file
+        app_config = self.apps.get(app_id)
+        if app_config is None:
+            raise KeyError(f"Unknown app: {app_id}")
+        if channel is None:
+            # Apps without a stable channel default to their first one
+            channels = app_config['channels']
+            channel = DEFAULT_CHANNEL if DEFAULT_CHANNEL in channels else channels[0]
+            manager = self._managers.get((app_id, channel))
+            if manager is not None:
+                self._managers[(app_id, None)] = manager
+                return manager
+        if channel not in app_config['channels']:
+            raise KeyError(f"Unknown channel {channel} for app {app_id}")
+        with self._lock:
+            manager = self._managers.get((app_id, channel))
+            if manager is None:
+                manager = VersionManager(app_id, channel, app_config=app_config, stats=self.stats, notifier=self.notifier)
+                self.notifier.watch((app_id, channel), manager)
+                self._managers[(app_id, channel)] = manager
+            return manager
+    
+    def managers(self) -> List[VersionManager]:
+        """Get the managers created so far (one per loaded catalog)"""
+        return list({id(manager): manager for manager in list(self._managers.values())}.values())
+    
+    def list_apps(self) -> List[Dict]:
+        """Get the configured apps and their channels"""
+        return [
+            {'appId': app_id, 'name': config['name'], 'channels': list(config['channels'])}
+            for app_id, config in self.apps.items()
+        ]
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""
+Version ordering for SnapUpdate Backend
+Parses versionName strings into comparable keys (semantic-version style)
+"""
+
+import re
+from typing import Optional, Tuple
+
+_VERSION_RE = re.compile(r'^[vV]?(\d+(?:\.\d+)*)(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$')
+
+def version_key(version_name) -> Optional[Tuple]:
+    """Comparable key for a version name, or None if unparseable ("1.2" == "1.2.0" < "1.3-beta.2" < "1.3" < "1.10")"""
+    if not isinstance(version_name, str):
+        return None
+    match = _VERSION_RE.match(version_name.strip())
+    if not match:
+        return None
+    
+    release = [int(part) for part in match.group(1).split('.')]
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+    
+    prerelease = match.group(2)
+    if prerelease is None:
+        return (tuple(release), 1, ())
+    identifiers = tuple((0, int(part), '') if part.isdigit() else (1, 0, part) for part in prerelease.split('.'))
+    return (tuple(release), 0, identifiers)
\ No newline at end of file
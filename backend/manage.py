@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+SnapUpdate Backend management commands
+Explicit bootstrap and maintenance steps kept out of worker startup
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from data.version_manager import CatalogRegistry, VersionManager
+from data.storage import DEFAULT_APP_ID, DEFAULT_CHANNEL, VERSIONS_DIR, JsonVersionStore, SqliteVersionStore, catalog_dir
+
+def seed(args):
+    """Seed the demo versions into an empty catalog"""
+    version_manager = VersionManager()
+    if version_manager.seed_demo_data(force=args.force):
+        return 0
+    print("ℹ️ Catalog already has versions - nothing to seed (use --force to overwrite)")
+    return 0
+
+def migrate_sqlite(args):
+    """Import versions.json into the SQLite backend in one transaction"""
+    source = JsonVersionStore(args.source or os.path.join(catalog_dir(args.app, args.channel), 'versions.json'))
+    target = SqliteVersionStore(args.db, f'{args.app}/{args.channel}')
+    revision, versions_data = source.load()
+    if not versions_data:
+        print(f"❌ No versions found in {source.versions_file}")
+        return 1
+    
+    with target.transaction() as target_versions:
+        target_versions.clear()
+        for version_name, record in sorted(versions_data.items(), key=lambda item: item[1]['versionCode']):
+            target_versions[version_name] = record
+    print(f"✅ Imported {len(versions_data)} {args.app}/{args.channel} versions (JSON revision {revision}) into {args.db}")
+    print("💡 Start the server with SNAPUPDATE_STORAGE=sqlite to use it")
+    return 0
+
+def build_patches(args):
+    """Build delta patches from recent versions to the latest one and wait for them"""
+    version_manager = CatalogRegistry().get(args.app, args.channel)
+    built = version_manager.build_patches()
+    print(f"✅ Built {len(built)} patch(es) in {version_manager.patches.patch_dir}")
+    return 0
+
+def index_apks(args):
+    """Extract metadata of new or changed APKs into the persisted manifest index and wait for it"""
+    version_manager = CatalogRegistry().get(args.app)
+    apk_index = version_manager.apk_index
+    apk_index.versions()
+    apk_index.wait()
+    manifests = apk_index.manifests()
+    for version in apk_index.versions():
+        meta = manifests.get(version)
+        if meta is None:
+            print(f"❌ {version}: not indexed")
+            continue
+        abis = ', '.join(meta['abis']) or 'any ABI'
+        print(f"📦 {version}: {meta['packageName']} versionCode {meta['versionCode']}, minSdk {meta['minSdk']}, "
+              f"{abis}, {meta['signatureScheme'] or 'unsigned'}, {meta['size']} bytes")
+    print(f"✅ Indexed {len(manifests)} APK(s) into {apk_index.index_file}")
+    return 0
+
+def _read_releases(path: str):
+    """Releases from a JSON list, {"versions": [...]}, or NDJSON file ("-" reads stdin)"""
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        text = f.read()
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        # One release per line
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return data.get('versions') if isinstance(data, dict) else data
+
+def publish(args):
+    """Add many versions from a file as one catalog revision (or check them with --dry-run)"""
+    try:
+        releases = _read_releases(args.file)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot read {args.file}: {e}")
+        return 1
+    if not isinstance(releases, list) or not releases:
+        print(f"❌ No versions found in {args.file}")
+        return 1
+    
+    try:
+        version_manager = CatalogRegistry().get(args.app, args.channel)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        return 1
+    result = version_manager.publish_versions(releases, dry_run=args.dry_run)
+    for conflict in result['conflicts']:
+        print(f"❌ #{conflict['index']} {conflict['versionName']}: {conflict['error']}")
+    if result['conflicts']:
+        print(f"❌ {len(result['conflicts'])} conflict(s) - nothing published")
+        return 1
+    for version in result['versions']:
+        print(f"📦 {version['versionName']}: versionCode {version['versionCode']}")
+    if args.dry_run:
+        print(f"✅ Dry run: {len(result['versions'])} version(s) would be published to {args.app}/{version_manager.channel}")
+    else:
+        print(f"✅ Published {len(result['versions'])} version(s) as revision {result['revision']}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SnapUpdate Backend management")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    seed_parser = commands.add_parser('seed', help="Seed demo versions if the catalog is empty")
+    seed_parser.add_argument('--force', action='store_true', help="Overwrite existing versions with the demo data")
+    seed_parser.set_defaults(handler=seed)
+    
+    migrate_parser = commands.add_parser('migrate-sqlite', help="Import versions.json into the SQLite backend")
+    migrate_parser.add_argument('--app', default=DEFAULT_APP_ID, help="App whose catalog is imported")
+    migrate_parser.add_argument('--channel', default=DEFAULT_CHANNEL, help="Channel whose catalog is imported")
+    migrate_parser.add_argument('--source', help="versions.json to import (defaults to the app channel's file)")
+    migrate_parser.add_argument('--db', default=os.getenv('SNAPUPDATE_DB', os.path.join(VERSIONS_DIR, 'versions.db')), help="SQLite database path")
+    migrate_parser.set_defaults(handler=migrate_sqlite)
+    
+    patches_parser = commands.add_parser('build-patches', help="Build delta patches to the latest version")
+    patches_parser.add_argument('--app', default=DEFAULT_APP_ID, help="App to build patches for")
+    patches_parser.add_argument('--channel', help="Channel whose latest version is the patch target")
+    patches_parser.set_defaults(handler=build_patches)
+    
+    index_parser = commands.add_parser('index-apks', help="Index APK metadata (manifest, ABIs, signer)")
+    index_parser.add_argument('--app', default=DEFAULT_APP_ID, help="App whose APK directory is indexed")
+    index_parser.set_defaults(handler=index_apks)
+    
+    publish_parser = commands.add_parser('publish', help="Add many versions (JSON or NDJSON) in one transaction")
+    publish_parser.add_argument('file', help="JSON list, {\"versions\": [...]} or NDJSON file of releases (- for stdin)")
+    publish_parser.add_argument('--app', default=DEFAULT_APP_ID, help="App to publish to")
+    publish_parser.add_argument('--channel', help="Channel to publish to")
+    publish_parser.add_argument('--dry-run', action='store_true', help="Validate and report conflicts without writing")
+    publish_parser.set_defaults(handler=publish)
+    
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
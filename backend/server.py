@@ -7,12 +7,22 @@ Main entry point for the Flask application
 import os
 import sys
 from app import create_app
+from data.version_manager import VersionManager
+
+def seed_first_run():
+    """Seed demo versions only on the very first run; a catalog emptied on purpose stays empty"""
+    version_manager = VersionManager()
+    if not version_manager.store.exists():
+        version_manager.seed_demo_data()
 
 def main():
     """Main server entry point"""
     print("🎨 SnapUpdate Backend Server")
     print("=" * 50)
     
+    # First run: seed demo versions only if the catalog was never written
+    seed_first_run()
+    
     # Create Flask app
     app = create_app()
     
@@ -29,6 +39,8 @@ def main():
     print(f"🔗 API Base URL: http://192.168.1.202:{port}/api/v1")
     print("\n📋 Available endpoints:")
     print("   - GET /api/v1/update - Check for updates")
+    print("   - GET /api/v1/update/stream - Wait for updates (SSE / long poll)")
+    print("   - POST /api/v1/update/batch - Check many devices at once (NDJSON)")
     print("   - GET /api/v1/health - Health check")
     print("   - GET /api/v1/versions - Get all versions")
     print("   - GET /api/v1/download/<version> - Download APK")
@@ -36,7 +48,9 @@ def main():
     print("   - GET /api/v1/apks/available - Get all available APK files")
     print("   - GET /api/v1/version/current - Get current server version")
     print("   - POST /api/v1/version/increment - Increment version")
+    print("   - POST /api/v1/versions/publish - Publish many versions in one revision")
     print("   - POST /api/v1/version/reset - Reset to v1.0 (complete cycle)")
+    print("   - GET /metrics - Prometheus metrics")
     print("\n💡 Press Ctrl+C to stop the server")
     print("=" * 50)
     
@@ -48,5 +62,6 @@ def main():
     )
 
 if __name__ == '__main__':
+    seed_first_run()
     app = create_app()
     app.run(host='0.0.0.0', port=5000, debug=True)  # Changed from 'localhost' to '0.0.0.0' 
\ No newline at end of file
@@ -31,6 +31,11 @@ def create_directories():
         os.makedirs(directory, exist_ok=True)
         print(f"✅ Created: {directory}")
 
+def seed_demo_versions():
+    """Seed demo versions into an empty catalog"""
+    print("🌱 Seeding demo versions...")
+    subprocess.check_call([sys.executable, "manage.py", "seed"])
+
 def main():
     print("🎨 SnapUpdate Backend Setup")
     print("=" * 40)
@@ -47,6 +52,9 @@ def main():
     # Create directories
     create_directories()
     
+    # Seed demo versions on first run (no-op when versions already exist)
+    seed_demo_versions()
+    
     print("\n🎯 Backend setup complete!")
     print("🚀 To start the server, run: python server.py")
     print("📱 Android app will connect to: https://geolink.pythonanywhere.com")
@@ -0,0 +1,26 @@
+"""
+Test setup for SnapUpdate Backend
+Points the data directory at a scratch location before any app module reads it at import time
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# data.storage resolves DATA_DIR on import, so this must run before the first test module imports it
+SCRATCH_DIR = tempfile.mkdtemp(prefix='snapupdate-tests-')
+os.environ['SNAPUPDATE_DATA_DIR'] = SCRATCH_DIR
+os.environ.setdefault('SNAPUPDATE_STORAGE', 'json')
+os.environ['CATALOG_WARM_UP'] = 'False'
+
+@pytest.fixture(scope='session', autouse=True)
+def scratch_data_dir():
+    """The data directory every test writes to; removed after the session"""
+    yield SCRATCH_DIR
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
\ No newline at end of file
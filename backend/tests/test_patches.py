@@ -0,0 +1,52 @@
+"""
+Tests for delta update packages
+"""
+
+import hashlib
+import zipfile
+
+import pytest
+
+from data.patches import apply_patch, build_patch
+
+def _write_apk(path, entries):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries.items():
+            archive.writestr(name, data)
+    return path
+
+def _sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+@pytest.fixture
+def apks(tmp_path):
+    shared = bytes(range(256)) * 400
+    old = _write_apk(tmp_path / 'old.apk', {'AndroidManifest.xml': b'<manifest v1/>', 'classes.dex': b'dex-v1' * 500,
+                                            'res/raw/blob.bin': shared})
+    new = _write_apk(tmp_path / 'new.apk', {'AndroidManifest.xml': b'<manifest v2/>', 'classes.dex': b'dex-v2' * 700,
+                                            'res/raw/blob.bin': shared, 'res/raw/extra.txt': b'new in 2.0'})
+    return str(old), str(new)
+
+def test_apply_patch_rebuilds_the_new_apk(apks, tmp_path):
+    old, new = apks
+    patch = str(tmp_path / 'patches' / 'old-new.patch')
+    meta = build_patch(old, new, patch)
+    out = str(tmp_path / 'rebuilt.apk')
+    apply_patch(old, patch, out)
+    
+    with open(out, 'rb') as rebuilt, open(new, 'rb') as expected:
+        assert rebuilt.read() == expected.read()
+    assert meta['sourceSha256'] == _sha256(old)
+    assert meta['targetSha256'] == _sha256(new)
+    assert meta['sha256'] == _sha256(patch)
+    # The shared entry is copied from the old APK rather than shipped again
+    assert meta['size'] < len(bytes(range(256)) * 400)
+
+def test_apply_patch_rejects_the_wrong_source(apks, tmp_path):
+    old, new = apks
+    patch = str(tmp_path / 'old-new.patch')
+    build_patch(old, new, patch)
+    other = str(_write_apk(tmp_path / 'other.apk', {'AndroidManifest.xml': b'<manifest v0/>', 'res/raw/blob.bin': b'x' * 1024}))
+    with pytest.raises(ValueError):
+        apply_patch(other, patch, str(tmp_path / 'rebuilt.apk'))
\ No newline at end of file
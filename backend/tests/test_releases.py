@@ -0,0 +1,36 @@
+"""
+Tests for bulk release planning
+"""
+
+from data.releases import plan_releases
+
+def test_implicit_codes_follow_input_order():
+    records, conflicts = plan_releases([{'versionName': '2.0'}, {'versionName': '2.1'}], {'1.0': 3})
+    assert conflicts == []
+    assert [(r['versionName'], r['versionCode']) for r in records] == [('2.0', 4), ('2.1', 5)]
+
+def test_implicit_code_before_later_explicit_code():
+    records, conflicts = plan_releases([{'versionName': '2.0'}, {'versionName': '2.1', 'versionCode': 50}], {'1.0': 3})
+    assert conflicts == []
+    assert [(r['versionName'], r['versionCode']) for r in records] == [('2.0', 4), ('2.1', 50)]
+
+def test_implicit_code_after_explicit_code():
+    records, conflicts = plan_releases([{'versionName': '2.0', 'versionCode': 10}, {'versionName': '2.1'}], {'1.0': 3})
+    assert conflicts == []
+    assert [(r['versionName'], r['versionCode']) for r in records] == [('2.0', 10), ('2.1', 11)]
+
+def test_explicit_code_below_previous_release_conflicts():
+    records, conflicts = plan_releases([{'versionName': '2.0', 'versionCode': 20}, {'versionName': '2.1', 'versionCode': 10}], {})
+    assert [r['versionName'] for r in records] == ['2.0']
+    assert [(c['index'], c['versionName']) for c in conflicts] == [(1, '2.1')]
+
+def test_implicit_code_taken_by_later_release_conflicts():
+    records, conflicts = plan_releases([{'versionName': '2.0'}, {'versionName': '2.1', 'versionCode': 4}], {'1.0': 3})
+    assert [(c['index'], c['versionName']) for c in conflicts] == [(0, '2.0')]
+    assert [(r['versionName'], r['versionCode']) for r in records] == [('2.1', 4)]
+
+def test_existing_names_and_codes_conflict():
+    releases = [{'versionName': '1.0'}, {'versionName': '2.0', 'versionCode': 3}, {'versionName': '2.1'}, {'versionName': '2.1'}]
+    records, conflicts = plan_releases(releases, {'1.0': 3})
+    assert [(r['versionName'], r['versionCode']) for r in records] == [('2.1', 4)]
+    assert [c['index'] for c in conflicts] == [0, 1, 3]
\ No newline at end of file
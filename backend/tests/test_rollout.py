@@ -0,0 +1,32 @@
+"""
+Tests for staged rollout bucketing
+"""
+
+from data.rollout import in_rollout, rollout_bucket
+
+def test_same_device_always_gets_the_same_answer():
+    version = {'versionName': '2.0', 'rolloutPercentage': 37}
+    for device in (f'device-{i}' for i in range(200)):
+        assert in_rollout(version, device) == in_rollout(dict(version), device)
+        assert rollout_bucket('2.0', device) == rollout_bucket('2.0', device)
+
+def test_percentage_selects_about_that_share():
+    version = {'versionName': '2.0', 'rolloutPercentage': 25}
+    selected = sum(in_rollout(version, f'device-{i}') for i in range(10000))
+    assert 2200 < selected < 2800
+
+def test_raising_the_percentage_only_adds_devices():
+    devices = [f'device-{i}' for i in range(2000)]
+    previous = set()
+    for percentage in (0, 10, 50, 90, 100):
+        current = {d for d in devices if in_rollout({'versionName': '2.0', 'rolloutPercentage': percentage}, d)}
+        assert previous <= current
+        previous = current
+    assert previous == set(devices)
+
+def test_cohorts_and_missing_device_ids():
+    version = {'versionName': '2.0', 'rolloutPercentage': 0, 'rolloutCohorts': ['beta']}
+    assert in_rollout(version, 'device-1', 'beta')
+    assert not in_rollout(version, 'device-1', 'stable')
+    assert not in_rollout({'versionName': '2.0', 'rolloutPercentage': 99}, None)
+    assert in_rollout({'versionName': '2.0'}, None)
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+Tests for the /update endpoint's conditional responses
+"""
+
+import pytest
+
+from app import create_app
+from data.version_manager import VersionManager
+
+@pytest.fixture(scope='module')
+def client():
+    VersionManager().seed_demo_data()
+    app = create_app(warm_up=False)
+    return app.test_client()
+
+def test_update_returns_an_etag(client):
+    response = client.get('/api/v1/update?version=1.0')
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert response.get_json()['versionName'] == '1.2'
+
+def test_matching_etag_gets_304_with_poll_hint(client):
+    etag = client.get('/api/v1/update?version=1.0').headers['ETag']
+    response = client.get('/api/v1/update?version=1.0', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert 'X-Next-Check-After' in response.headers
+
+def test_stale_etag_gets_a_full_response(client):
+    etag = client.get('/api/v1/update?version=1.0').headers['ETag']
+    response = client.get('/api/v1/update?version=1.2', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.get_json()['hasUpdate'] is False
\ No newline at end of file